@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import joblib
-from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, StandardScaler
+from loaders import load_encoder, load_image_assets, load_model, load_prediction_cache, load_predictor, load_vocabulary
+from vocabulary import build_vocabulary
 
 # === PAGE SETUP ===
 st.set_page_config(layout="wide", page_title="Car Price Analysis & Prediction App")
@@ -140,67 +141,35 @@ car_icon = """
 """
 
 # === LOAD DATA AND MODEL ===
-try:
-    df = pd.read_csv('Electric_cars_dataset.csv')
-    model = joblib.load("svr_model.joblib")
-except Exception as e:
-    st.error(f"Error loading data or model: {e}")
-    st.warning("Please update the file paths in the code to match your environment.")
-    # Create sample data for demonstration
-    df = pd.DataFrame({
-        'Make': ['TESLA', 'BMW', 'NISSAN'],
-        'Model': ['MODEL 3', 'I3', 'LEAF'],
-        'Model_Year': [2020, 2019, 2018],
-        'Electric_Vehicle_Type': ['Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)'],
-        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility': ['Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible'],
-        'Electric_Range': [300, 150, 200],
-        'County': ['King', 'Pierce', 'Snohomish'],
-        'City': ['Seattle', 'Tacoma', 'Everett'],
-        'Electric_Utility': ['SEATTLE CITY LIGHT', 'TACOMA POWER', 'SNOHOMISH COUNTY PUD'],
-        'Legislative_District': ['43', '27', '38']
-    })
-    model = None
+def load_prediction_resources():
+    """Prediction cache and dropdown vocabulary, loaded the first time the Prediction view runs"""
+    # Shared by every session of this server process, reloaded when the files change
+    try:
+        model = load_model()
+        encoder = load_encoder(model)
+        prices = load_prediction_cache(load_predictor(model, encoder), encoder)
+        vocab = load_vocabulary()
+    except Exception as e:
+        st.error(f"Error loading data or model: {e}")
+        st.warning("Please update the file paths in the code to match your environment.")
+        # Create sample data for demonstration
+        df = pd.DataFrame({
+            'Make': ['TESLA', 'BMW', 'NISSAN'],
+            'Model': ['MODEL 3', 'I3', 'LEAF'],
+            'Model_Year': [2020, 2019, 2018],
+            'Electric_Vehicle_Type': ['Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)'],
+            'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility': ['Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible'],
+            'Electric_Range': [300, 150, 200],
+            'County': ['King', 'Pierce', 'Snohomish'],
+            'City': ['Seattle', 'Tacoma', 'Everett'],
+            'Electric_Utility': ['SEATTLE CITY LIGHT', 'TACOMA POWER', 'SNOHOMISH COUNTY PUD'],
+            'Legislative_District': ['43', '27', '38'],
+            'ZIP_Code': [98101, 98402, 98201]
+        })
+        prices = None
+        vocab = build_vocabulary(df)
 
-# Clean column names
-df.columns = df.columns.str.replace(' ', '_')
-
-# Define columns for processing
-drop_cols = ['ID', 'State', 'VIN_(1-10)', 'ZIP_Code', 'DOL_Vehicle_ID', 'Vehicle_Location', 'Base_MSRP']
-freq_cols = ['County', 'Electric_Utility', 'Legislative_District', 'City']
-onehot_cols = ['Make', 'Model', 'Electric_Vehicle_Type', 'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility']
-scale_cols = ['Model_Year', 'Electric_Range']
-
-# Get unique values for each column
-freq_uniques = {col: df[col].dropna().unique().tolist() for col in freq_cols}
-onehot_uniques = {col: df[col].dropna().unique().tolist() for col in onehot_cols}
-scale_uniques = {col: df[col].dropna().unique().tolist() for col in scale_cols}
-
-# Define the exact column order expected by the model
-correct_column_order = ['Model_Year','Electric_Range','County_freq','Electric_Utility_freq','Legislative_District_freq','City_freq',
-                        'Make_AUDI','Make_AZURE DYNAMICS','Make_BENTLEY','Make_BMW','Make_CADILLAC','Make_CHEVROLET','Make_CHRYSLER',
-                        'Make_DODGE','Make_FIAT','Make_FISKER','Make_FORD','Make_HONDA','Make_HYUNDAI','Make_JAGUAR','Make_JEEP',
-                        'Make_KIA','Make_LAND ROVER','Make_LINCOLN','Make_MERCEDES-BENZ','Make_MINI','Make_MITSUBISHI','Make_NISSAN',
-                        'Make_POLESTAR','Make_PORSCHE','Make_SMART','Make_SUBARU','Make_TESLA','Make_TH!NK','Make_TOYOTA',
-                        'Make_VOLKSWAGEN','Make_VOLVO','Make_WHEEGO ELECTRIC CARS','Model_$16.36K','Model_330E','Model_500',
-                        'Model_530E','Model_530E XDRIVE','Model_740E XDRIVE','Model_745E','Model_918 SPYDER','Model_A3','Model_A7',
-                        'Model_A8 E','Model_ACCORD','Model_AVIATOR','Model_B-CLASS','Model_BENTAYGA','Model_BOLT EV','Model_C-CLASS',
-                        'Model_C-MAX','Model_CARAVAN','Model_CAYENNE','Model_CITY','Model_CLARITY','Model_CORSAIR','Model_COUNTRYMAN',
-                        'Model_CROSSTREK HYBRID AWD','Model_CT6','Model_E-GOLF','Model_E-TRON','Model_E-TRON SPORTBACK','Model_ELR',
-                        'Model_EQ FORTWO','Model_ESCAPE','Model_FOCUS','Model_FORTWO','Model_FORTWO ELECTRIC DRIVE','Model_FUSION',
-                        'Model_GLC-CLASS','Model_GLE-CLASS','Model_HARDTOP','Model_I-MIEV','Model_I-PACE','Model_I3','Model_I8',
-                        'Model_IONIQ','Model_KARMA','Model_KONA','Model_LEAF','Model_LIFE','Model_MODEL 3','Model_MODEL S',
-                        'Model_MODEL X','Model_MODEL Y','Model_NIRO','Model_NIRO ELECTRIC','Model_NIRO PLUG-IN HYBRID','Model_OPTIMA',
-                        'Model_OPTIMA PLUG-IN HYBRID','Model_OUTLANDER','Model_PACIFICA','Model_PANAMERA','Model_PRIUS PLUG-IN',
-                        'Model_PRIUS PLUG-IN HYBRID','Model_PRIUS PRIME','Model_PS2','Model_Q5','Model_Q5 E','Model_RANGE ROVER',
-                        'Model_RANGE ROVER SPORT','Model_RANGER','Model_RAV4','Model_RAV4 PRIME','Model_ROADSTER','Model_S-CLASS',
-                        'Model_S60','Model_S90','Model_SANTA FE','Model_SONATA','Model_SONATA PLUG-IN HYBRID','Model_SORENTO',
-                        'Model_SOUL','Model_SOUL EV','Model_SPARK','Model_TAYCAN','Model_TRANSIT CONNECT ELECTRIC','Model_TUCSON',
-                        'Model_VOLT','Model_WRANGLER','Model_X3','Model_X5','Model_XC60','Model_XC60 AWD','Model_XC60 AWD PHEV',
-                        'Model_XC90','Model_XC90 AWD','Model_XC90 AWD PHEV','Electric_Vehicle_Type_Battery Electric Vehicle (BEV)',
-                        'Electric_Vehicle_Type_Plug-in Hybrid Electric Vehicle (PHEV)','Electric_Vehicle_Type_nan',
-                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_Clean Alternative Fuel Vehicle Eligible',
-                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_Not eligible due to low battery range',
-                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_nan']
+    return prices, vocab
 
 # === APP LAYOUT ===
 # Main container
@@ -216,32 +185,13 @@ with main_container:
     with col2:
         st.markdown("<h1 style='text-align: center;'>Car Price Analysis & Prediction App</h1>", unsafe_allow_html=True)
     
-    # Custom tabs
-    st.markdown("""
-    <div class="tab-nav">
-        <div class="tab tab-active" id="tab-home" onclick="switchTab('home')">
-            <span style="color: #e11d48;">●</span> Home
-        </div>
-        <div class="tab" id="tab-analysis" onclick="switchTab('analysis')">
-            Analysis
-        </div>
-        <div class="tab" id="tab-prediction" onclick="switchTab('prediction')">
-            Prediction
-        </div>
-    </div>
+    # View selector: unlike st.tabs, only the selected view's code runs on a rerun
+    views = ["Home", "Analysis", "Prediction"]
+    default_view = next((v for v in views if v.lower() == current_page), "Home")
+    view = st.radio("View", views, index=views.index(default_view), horizontal=True, label_visibility="collapsed")
     
-    <script>
-    function switchTab(tabName) {
-        // This would normally handle tab switching, but we'll use Streamlit's own tab system
-    }
-    </script>
-    """, unsafe_allow_html=True)
-    
-    # Create tabs using Streamlit
-    tab1, tab2, tab3 = st.tabs(["Home", "Analysis", "Prediction"])
-    
-    # === HOME TAB ===
-    with tab1:
+    # === HOME VIEW ===
+    if view == "Home":
         st.markdown("""
         <div class="card">
             <h2>Are you curious about the potential market price of a car?</h2>
@@ -316,8 +266,8 @@ with main_container:
         </div>
         """, unsafe_allow_html=True)
     
-    # === ANALYSIS TAB ===
-    with tab2:
+    # === ANALYSIS VIEW ===
+    elif view == "Analysis":
         st.markdown("""
         <div class="card">
             <h2>🔍 Model Evaluation Overview</h2>
@@ -396,8 +346,10 @@ with main_container:
         </div>
         """, unsafe_allow_html=True)
     
-    # === PREDICTION TAB ===
-    with tab3:
+    # === PREDICTION VIEW ===
+    elif view == "Prediction":
+        prices, vocab = load_prediction_resources()
+
         # Main layout with sidebar-like left panel and content area
         col1, col2 = st.columns([1, 2])
         
@@ -408,31 +360,41 @@ with main_container:
             </div>
             """, unsafe_allow_html=True)
             
-            # Vehicle filters
-            make = st.selectbox("🚘 Make", onehot_uniques['Make'])
-            model_car = st.selectbox("📦 Model", onehot_uniques['Model'])
+            # Vehicle filters, each narrowed by the prebuilt Make -> Model index
+            make = st.selectbox("🚘 Make", list(vocab['cars']))
+            model_car = st.selectbox("📦 Model", list(vocab['cars'][make]))
+            car = vocab['cars'][make][model_car]
             
-            # Year slider
-            min_year = int(min(scale_uniques['Model_Year'])) if scale_uniques['Model_Year'] else 2010
-            max_year = int(max(scale_uniques['Model_Year'])) if scale_uniques['Model_Year'] else 2023
-            model_year = st.slider("📅 Model Year", min_year, max_year, value=min_year + (max_year - min_year) // 2)
+            # Year slider, over the years this model was registered (a single year needs no slider)
+            min_year, max_year = car['Model_Year']
+            if min_year == max_year:
+                model_year = min_year
+                st.caption(f"📅 Model Year: {model_year} (the only year registered for this model)")
+            else:
+                model_year = st.slider("📅 Model Year", min_year, max_year, value=min_year + (max_year - min_year) // 2)
             
             # EV type
-            ev_type = st.selectbox("⚡ Electric Vehicle Type", onehot_uniques['Electric_Vehicle_Type'])
+            ev_type = st.selectbox("⚡ Electric Vehicle Type", car['Electric_Vehicle_Type'])
             
             # CAFV eligibility
-            cafv = st.selectbox("♻️ CAFV Eligibility", onehot_uniques['Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility'])
+            cafv = st.selectbox("♻️ CAFV Eligibility", car['Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility'])
             
             # Electric range
-            min_range = int(min(scale_uniques['Electric_Range'])) if scale_uniques['Electric_Range'] else 50
-            max_range = int(max(scale_uniques['Electric_Range'])) if scale_uniques['Electric_Range'] else 400
-            electric_range = st.slider("🔋 Electric Range (miles)", min_range, max_range, value=min_range + (max_range - min_range) // 2)
+            min_range, max_range = car['Electric_Range']
+            if min_range == max_range:
+                electric_range = min_range
+                st.caption(f"🔋 Electric Range: {electric_range} miles (the only range registered for this model)")
+            else:
+                electric_range = st.slider("🔋 Electric Range (miles)", min_range, max_range,
+                                           value=min_range + (max_range - min_range) // 2)
             
             # Location details
-            county = st.selectbox("🏙️ County", freq_uniques['County'])
-            city = st.selectbox("📍 City", freq_uniques['City'])
-            utility = st.selectbox("🏢 Electric Utility", freq_uniques['Electric_Utility'])
-            district = st.selectbox("🏛️ Legislative District", freq_uniques['Legislative_District'])
+            # One ZIP code fills in the four location fields from the prebuilt index
+            zip_code = st.selectbox("📮 ZIP Code", list(vocab['zip_codes']))
+            location = vocab['zip_codes'][zip_code]
+            county, city = location['County'], location['City']
+            utility, district = location['Electric_Utility'], location['Legislative_District']
+            st.caption(f"{city}, {county} County · {utility} · Legislative District {district}")
         
         with col2:
             st.markdown("""
@@ -444,73 +406,27 @@ with main_container:
             """, unsafe_allow_html=True)
             
             # Car image
-            st.image("https://www.neodrift.in/cdn/shop/articles/best-resale-cars-featured.jpg?v=1722222661", use_column_width=True)
+            st.image(str(load_image_assets()['hero']['path']), use_column_width=True)
             
             # Create input DataFrame for prediction
             if st.button("Estimate Price", type="primary"):
                 try:
-                    # Create raw input DataFrame
-                    input_df = pd.DataFrame({
-                        'Make': [make],
-                        'Model': [model_car],
-                        'Model_Year': [model_year],
-                        'Electric_Vehicle_Type': [ev_type],
-                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility': [cafv],
-                        'Electric_Range': [electric_range],
-                        'County': [county],
-                        'Electric_Utility': [utility],
-                        'Legislative_District': [district],
-                        'City': [city]
-                    })
-
-                    # === Frequency Encoding ===
-                    for col in freq_cols:
-                        mapping = df[col].value_counts().to_dict()
-                        input_df[col + '_freq'] = input_df[col].map(mapping).fillna(0)
-
-                    freq_scaled = MinMaxScaler()
-                    input_df[[col + '_freq' for col in freq_cols]] = freq_scaled.fit_transform(
-                        input_df[[col + '_freq' for col in freq_cols]]
-                    )
-                    input_df.drop(columns=freq_cols, inplace=True)
-
-                    # === Create DataFrame with all expected columns ===
-                    # Initialize a DataFrame with zeros for all expected columns
-                    prediction_df = pd.DataFrame(0, index=[0], columns=correct_column_order)
-                    
-                    # Fill in the scaled numeric columns
-                    prediction_df['Model_Year'] = input_df['Model_Year'].values[0]
-                    prediction_df['Electric_Range'] = input_df['Electric_Range'].values[0]
-                    
-                    # Fill in the frequency encoded columns
-                    for col in ['County_freq', 'Electric_Utility_freq', 'Legislative_District_freq', 'City_freq']:
-                        if col in input_df.columns:
-                            prediction_df[col] = input_df[col].values[0]
-                    
-                    # One-hot encode categorical variables
-                    # Make
-                    make_col = f"Make_{make}"
-                    if make_col in prediction_df.columns:
-                        prediction_df[make_col] = 1
-                    
-                    # Model
-                    model_col = f"Model_{model_car}"
-                    if model_col in prediction_df.columns:
-                        prediction_df[model_col] = 1
-                    
-                    # Electric Vehicle Type
-                    ev_type_col = f"Electric_Vehicle_Type_{ev_type}"
-                    if ev_type_col in prediction_df.columns:
-                        prediction_df[ev_type_col] = 1
-                    
-                    # CAFV Eligibility
-                    cafv_col = f"Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_{cafv}"
-                    if cafv_col in prediction_df.columns:
-                        prediction_df[cafv_col] = 1
+                    inputs = {
+                        'Make': make,
+                        'Model': model_car,
+                        'Model_Year': model_year,
+                        'Electric_Vehicle_Type': ev_type,
+                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility': cafv,
+                        'Electric_Range': electric_range,
+                        'County': county,
+                        'Electric_Utility': utility,
+                        'Legislative_District': district,
+                        'City': city
+                    }
 
-                    # === Predict Price ===
-                    if model is not None:
-                        predicted_price = model.predict(prediction_df)[0]
+                    # === Predict Price (cached per input combination) ===
+                    if prices is not None:
+                        predicted_price = prices.predict(inputs)
                         st.markdown(f"""
                         <div class="prediction-result">
                             <h3>💰 Estimated Price:</h3>
@@ -4,7 +4,17 @@ import numpy as np
 import joblib
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, StandardScaler
+from batch import input_cols, prepare_batch, restore_columns, score_batch
+from chart_data import grid_shape
+from figures import TEMPLATE, cached_figure
+from image_assets import car_image_path
+from loaders import (load_encoder, load_image_assets, load_importance, load_model, load_prediction_cache, load_predictor,
+                     load_price_cube, load_price_quantiles, load_range_tiles, load_similar_car_index, load_vocabulary)
+from price_cube import slice_price_bands, slice_price_cube
+from price_quantiles import segment_quantiles
+from range_tiles import select_range_tiles
+from vocabulary import build_vocabulary
+from what_if import car_sweep_ranges, what_if_curves
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
@@ -343,110 +353,60 @@ car_icon = """
 """
 
 # === LOAD DATA AND MODEL ===
-try:
-    df = pd.read_csv('Electric_cars_dataset.csv')
-    model = joblib.load("svr_model.joblib")
-except Exception as e:
-    st.error(f"Error loading data or model: {e}")
-    st.warning("Please update the file paths in the code to match your environment.")
-    # Create sample data for demonstration
-    df = pd.DataFrame({
-        'Make': ['TESLA', 'BMW', 'NISSAN', 'CHEVROLET', 'FORD', 'AUDI', 'PORSCHE', 'HYUNDAI', 'KIA', 'VOLKSWAGEN'],
-        'Model': ['MODEL 3', 'I3', 'LEAF', 'BOLT EV', 'MUSTANG MACH-E', 'E-TRON', 'TAYCAN', 'IONIQ', 'NIRO', 'ID.4'],
-        'Model_Year': [2022, 2021, 2020, 2022, 2021, 2022, 2021, 2020, 2022, 2021],
-        'Electric_Vehicle_Type': ['Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)',
-                                 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)',
-                                 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)',
-                                 'Battery Electric Vehicle (BEV)'],
-        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility': ['Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible', 
-                                                             'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible',
-                                                             'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible',
-                                                             'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible',
-                                                             'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible'],
-        'Electric_Range': [350, 180, 220, 260, 300, 220, 280, 170, 240, 250],
-        'County': ['King', 'Pierce', 'Snohomish', 'King', 'Pierce', 'King', 'Snohomish', 'King', 'Pierce', 'Snohomish'],
-        'City': ['Seattle', 'Tacoma', 'Everett', 'Bellevue', 'Tacoma', 'Seattle', 'Everett', 'Redmond', 'Tacoma', 'Everett'],
-        'Electric_Utility': ['SEATTLE CITY LIGHT', 'TACOMA POWER', 'SNOHOMISH COUNTY PUD', 'PUGET SOUND ENERGY', 'TACOMA POWER',
-                            'SEATTLE CITY LIGHT', 'SNOHOMISH COUNTY PUD', 'PUGET SOUND ENERGY', 'TACOMA POWER', 'SNOHOMISH COUNTY PUD'],
-        'Legislative_District': ['43', '27', '38', '41', '27', '43', '38', '45', '27', '38'],
-        'Expected_Price': [45000, 35000, 28000, 32000, 42000, 55000, 80000, 30000, 33000, 38000]
-    })
-    model = None
-
-# Clean column names
-df.columns = df.columns.str.replace(' ', '_')
-
-# Define columns for processing
-drop_cols = ['ID', 'State', 'VIN_(1-10)', 'ZIP_Code', 'DOL_Vehicle_ID', 'Vehicle_Location', 'Base_MSRP']
-freq_cols = ['County', 'Electric_Utility', 'Legislative_District', 'City']
-onehot_cols = ['Make', 'Model', 'Electric_Vehicle_Type', 'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility']
-scale_cols = ['Model_Year', 'Electric_Range']
-
-# Get unique values for each column
-freq_uniques = {col: df[col].dropna().unique().tolist() for col in freq_cols}
-onehot_uniques = {col: df[col].dropna().unique().tolist() for col in onehot_cols}
-scale_uniques = {col: df[col].dropna().unique().tolist() for col in scale_cols}
+def load_prediction_resources():
+    """Prediction cache and dropdown vocabulary, loaded the first time the Prediction view runs"""
+    # Shared by every session of this server process, reloaded when the files change
+    try:
+        model = load_model()
+        encoder = load_encoder(model)
+        prices = load_prediction_cache(load_predictor(model, encoder), encoder)
+        vocab = load_vocabulary()
+    except Exception as e:
+        st.error(f"Error loading data or model: {e}")
+        st.warning("Please update the file paths in the code to match your environment.")
+        # Create sample data for demonstration
+        df = pd.DataFrame({
+            'Make': ['TESLA', 'BMW', 'NISSAN', 'CHEVROLET', 'FORD', 'AUDI', 'PORSCHE', 'HYUNDAI', 'KIA', 'VOLKSWAGEN'],
+            'Model': ['MODEL 3', 'I3', 'LEAF', 'BOLT EV', 'MUSTANG MACH-E', 'E-TRON', 'TAYCAN', 'IONIQ', 'NIRO', 'ID.4'],
+            'Model_Year': [2022, 2021, 2020, 2022, 2021, 2022, 2021, 2020, 2022, 2021],
+            'Electric_Vehicle_Type': ['Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)',
+                                     'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)',
+                                     'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)', 'Battery Electric Vehicle (BEV)',
+                                     'Battery Electric Vehicle (BEV)'],
+            'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility': ['Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible', 
+                                                                 'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible',
+                                                                 'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible',
+                                                                 'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible',
+                                                                 'Clean Alternative Fuel Vehicle Eligible', 'Clean Alternative Fuel Vehicle Eligible'],
+            'Electric_Range': [350, 180, 220, 260, 300, 220, 280, 170, 240, 250],
+            'County': ['King', 'Pierce', 'Snohomish', 'King', 'Pierce', 'King', 'Snohomish', 'King', 'Pierce', 'Snohomish'],
+            'City': ['Seattle', 'Tacoma', 'Everett', 'Bellevue', 'Tacoma', 'Seattle', 'Everett', 'Redmond', 'Tacoma', 'Everett'],
+            'Electric_Utility': ['SEATTLE CITY LIGHT', 'TACOMA POWER', 'SNOHOMISH COUNTY PUD', 'PUGET SOUND ENERGY', 'TACOMA POWER',
+                                'SEATTLE CITY LIGHT', 'SNOHOMISH COUNTY PUD', 'PUGET SOUND ENERGY', 'TACOMA POWER', 'SNOHOMISH COUNTY PUD'],
+            'Legislative_District': ['43', '27', '38', '41', '27', '43', '38', '45', '27', '38'],
+            'ZIP_Code': [98101, 98402, 98201, 98004, 98402, 98101, 98201, 98052, 98402, 98201],
+            'Expected_Price': [45000, 35000, 28000, 32000, 42000, 55000, 80000, 30000, 33000, 38000]
+        })
+        prices = None
+        vocab = build_vocabulary(df)
 
-# Define the exact column order expected by the model
-correct_column_order = ['Model_Year','Electric_Range','County_freq','Electric_Utility_freq','Legislative_District_freq','City_freq',
-                        'Make_AUDI','Make_AZURE DYNAMICS','Make_BENTLEY','Make_BMW','Make_CADILLAC','Make_CHEVROLET','Make_CHRYSLER',
-                        'Make_DODGE','Make_FIAT','Make_FISKER','Make_FORD','Make_HONDA','Make_HYUNDAI','Make_JAGUAR','Make_JEEP',
-                        'Make_KIA','Make_LAND ROVER','Make_LINCOLN','Make_MERCEDES-BENZ','Make_MINI','Make_MITSUBISHI','Make_NISSAN',
-                        'Make_POLESTAR','Make_PORSCHE','Make_SMART','Make_SUBARU','Make_TESLA','Make_TH!NK','Make_TOYOTA',
-                        'Make_VOLKSWAGEN','Make_VOLVO','Make_WHEEGO ELECTRIC CARS','Model_$16.36K','Model_330E','Model_500',
-                        'Model_530E','Model_530E XDRIVE','Model_740E XDRIVE','Model_745E','Model_918 SPYDER','Model_A3','Model_A7',
-                        'Model_A8 E','Model_ACCORD','Model_AVIATOR','Model_B-CLASS','Model_BENTAYGA','Model_BOLT EV','Model_C-CLASS',
-                        'Model_C-MAX','Model_CARAVAN','Model_CAYENNE','Model_CITY','Model_CLARITY','Model_CORSAIR','Model_COUNTRYMAN',
-                        'Model_CROSSTREK HYBRID AWD','Model_CT6','Model_E-GOLF','Model_E-TRON','Model_E-TRON SPORTBACK','Model_ELR',
-                        'Model_EQ FORTWO','Model_ESCAPE','Model_FOCUS','Model_FORTWO','Model_FORTWO ELECTRIC DRIVE','Model_FUSION',
-                        'Model_GLC-CLASS','Model_GLE-CLASS','Model_HARDTOP','Model_I-MIEV','Model_I-PACE','Model_I3','Model_I8',
-                        'Model_IONIQ','Model_KARMA','Model_KONA','Model_LEAF','Model_LIFE','Model_MODEL 3','Model_MODEL S',
-                        'Model_MODEL X','Model_MODEL Y','Model_NIRO','Model_NIRO ELECTRIC','Model_NIRO PLUG-IN HYBRID','Model_OPTIMA',
-                        'Model_OPTIMA PLUG-IN HYBRID','Model_OUTLANDER','Model_PACIFICA','Model_PANAMERA','Model_PRIUS PLUG-IN',
-                        'Model_PRIUS PLUG-IN HYBRID','Model_PRIUS PRIME','Model_PS2','Model_Q5','Model_Q5 E','Model_RANGE ROVER',
-                        'Model_RANGE ROVER SPORT','Model_RANGER','Model_RAV4','Model_RAV4 PRIME','Model_ROADSTER','Model_S-CLASS',
-                        'Model_S60','Model_S90','Model_SANTA FE','Model_SONATA','Model_SONATA PLUG-IN HYBRID','Model_SORENTO',
-                        'Model_SOUL','Model_SOUL EV','Model_SPARK','Model_TAYCAN','Model_TRANSIT CONNECT ELECTRIC','Model_TUCSON',
-                        'Model_VOLT','Model_WRANGLER','Model_X3','Model_X5','Model_XC60','Model_XC60 AWD','Model_XC60 AWD PHEV',
-                        'Model_XC90','Model_XC90 AWD','Model_XC90 AWD PHEV','Electric_Vehicle_Type_Battery Electric Vehicle (BEV)',
-                        'Electric_Vehicle_Type_Plug-in Hybrid Electric Vehicle (PHEV)','Electric_Vehicle_Type_nan',
-                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_Clean Alternative Fuel Vehicle Eligible',
-                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_Not eligible due to low battery range',
-                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_nan']
+    return prices, vocab
 
 # === HELPER FUNCTIONS ===
-def get_car_image_url(make, model):
-    """Return a relevant car image URL based on make and model"""
-    # This is a simplified version - in a real app, you'd have a database of images
-    car_images = {
-        'TESLA': {
-            'MODEL 3': "https://images.unsplash.com/photo-1560958089-b8a1929cea89?w=800",
-            'MODEL S': "https://images.unsplash.com/photo-1620891549027-942fdc95d3f5?w=800",
-            'MODEL X': "https://images.unsplash.com/photo-1566055909643-a51b4271d2bf?w=800",
-            'MODEL Y': "https://images.unsplash.com/photo-1617704548623-340376564e68?w=800"
-        },
-        'BMW': {
-            'I3': "https://images.unsplash.com/photo-1580273916550-e323be2ae537?w=800",
-            'I8': "https://images.unsplash.com/photo-1556189250-72ba954cfc2b?w=800"
-        },
-        'NISSAN': {
-            'LEAF': "https://images.unsplash.com/photo-1593055357429-62eaf3b259cc?w=800"
-        }
-    }
-    
-    # Try to get specific model image
-    if make in car_images and model in car_images[make]:
-        return car_images[make][model]
-    
-    # Fall back to generic EV image
-    return "https://images.unsplash.com/photo-1593941707882-a5bba14938c7?w=800"
+def get_car_image(make, model):
+    """Local, pre-resized picture of the make and model, or the generic one"""
+    return car_image_path(load_image_assets(), make, model)
 
-def create_price_gauge(price, min_price=20000, max_price=100000):
-    """Create a gauge chart for price visualization"""
+@cached_figure
+def create_price_gauge(price, quantiles, segment):
+    """Gauge placing a price against the 5/25/50/75/95% Expected_Price quantiles of its segment"""
+    q05, q25, q50, q75, q95 = quantiles
+    min_price, max_price = min(q05, price), max(q95, price)
     fig = go.Figure(go.Indicator(
         mode = "gauge+number",
         value = price,
         number = {"prefix": "$", "valueformat": ",.0f"},
+        title = {'text': f"vs. {segment}", 'font': {'size': 16}},
         domain = {'x': [0, 1], 'y': [0, 1]},
         gauge = {
             'axis': {'range': [min_price, max_price], 'tickwidth': 1, 'tickcolor': "white"},
@@ -455,60 +415,75 @@ def create_price_gauge(price, min_price=20000, max_price=100000):
             'borderwidth': 2,
             'bordercolor': "#333",
             'steps': [
-                {'range': [min_price, min_price + (max_price-min_price)/3], 'color': '#4CAF50'},
-                {'range': [min_price + (max_price-min_price)/3, min_price + 2*(max_price-min_price)/3], 'color': '#FFC107'},
-                {'range': [min_price + 2*(max_price-min_price)/3, max_price], 'color': '#F44336'}
-            ]
+                {'range': [min_price, q25], 'color': '#4CAF50'},
+                {'range': [q25, q75], 'color': '#FFC107'},
+                {'range': [q75, max_price], 'color': '#F44336'}
+            ],
+            'threshold': {'line': {'color': "white", 'width': 3}, 'thickness': 0.8, 'value': q50}
         }
     ))
     
     fig.update_layout(
-        paper_bgcolor = "rgba(0,0,0,0)",
-        font = {'color': "white", 'family': "Arial"},
+        template = TEMPLATE,
         height = 300,
-        margin = dict(l=20, r=20, t=50, b=20)
+        margin = dict(t=50)
     )
     
     return fig
 
-def create_feature_importance_chart():
-    """Create a feature importance chart"""
-    # This is a simplified version - in a real app, you'd extract this from your model
-    features = ['Electric Range', 'Model Year', 'Make', 'Model', 'Vehicle Type', 'County']
-    importance = [0.35, 0.25, 0.15, 0.12, 0.08, 0.05]
+@cached_figure
+def create_feature_importance_chart(importance):
+    """Bar chart of the permutation importances computed by build_artifacts.py"""
+    labels = {'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility': 'CAFV Eligibility',
+              'Electric_Vehicle_Type': 'Vehicle Type'}
+    columns = sorted(importance['columns'].items(), key=lambda item: item[1]['mean'])
+    features = [labels.get(col, col.replace('_', ' ')) for col, _ in columns]
+    drops = [values['mean'] for _, values in columns]
     
     fig = px.bar(
-        x=importance, 
+        x=drops, 
         y=features, 
         orientation='h',
-        labels={'x': 'Importance', 'y': 'Feature'},
-        color=importance,
-        color_continuous_scale=['#e11d48', '#ff4d6d', '#ff758f', '#ff8fa3', '#ffb3c1', '#ffd6e0']
+        error_x=[values['std'] for _, values in columns],
+        labels={'x': 'Drop in R² when shuffled', 'y': 'Feature'},
+        color=drops,
+        color_continuous_scale=['#ffd6e0', '#ffb3c1', '#ff8fa3', '#ff758f', '#ff4d6d', '#e11d48']
     )
     
     fig.update_layout(
-        paper_bgcolor = "rgba(0,0,0,0)",
+        template = TEMPLATE,
         plot_bgcolor = "rgba(0,0,0,0)",
-        font = {'color': "white", 'family': "Arial"},
-        height = 300,
-        margin = dict(l=20, r=20, t=30, b=20),
+        height = 400,
         coloraxis_showscale=False
     )
     
     return fig
 
-def create_price_comparison_chart(predicted_price, similar_cars):
-    """Create a chart comparing predicted price with similar cars"""
+@cached_figure
+def create_similar_cars_chart(similar_cars):
+    """Bar chart of the similar cars' prices, shared by every estimate that finds them"""
     fig = px.bar(
         similar_cars, 
-        x='Model', 
+        x='Car', 
         y='Price',
         color='Make',
         color_discrete_sequence=px.colors.qualitative.Bold,
-        labels={'Price': 'Price ($)', 'Model': 'Car Model'},
-        text_auto=True
+        labels={'Price': 'Price ($)', 'Car': 'Car Model'},
+        text_auto=',.0f'
+    )
+    
+    fig.update_layout(
+        template = TEMPLATE,
+        height = 400
     )
     
+    return fig
+
+def create_price_comparison_chart(predicted_price, similar_cars):
+    """Create a chart comparing predicted price with similar cars"""
+    # Copy of the cached bars: only the predicted price line is drawn per request
+    fig = go.Figure(create_similar_cars_chart(similar_cars))
+    
     # Add line for predicted price
     fig.add_shape(
         type="line",
@@ -527,28 +502,274 @@ def create_price_comparison_chart(predicted_price, similar_cars):
         font=dict(color="#e11d48", size=14)
     )
     
+    return fig
+
+@cached_figure
+def create_what_if_curve(curve, col, label):
+    """Line chart of the estimate across one input, shared while the other inputs stay the same"""
+    fig = px.line(
+        curve,
+        x=col,
+        y='Price',
+        labels={'Price': 'Estimated Price ($)', col: label},
+        color_discrete_sequence=['#e11d48']
+    )
+    
     fig.update_layout(
-        paper_bgcolor = "rgba(0,0,0,0)",
-        plot_bgcolor = "rgba(26,26,26,1)",
-        font = {'color': "white", 'family': "Arial"},
-        height = 400,
-        margin = dict(l=20, r=20, t=30, b=20)
+        template = TEMPLATE,
+        height = 300,
+        yaxis_tickprefix = "$"
+    )
+    
+    return fig
+
+def create_what_if_chart(curve, col, current_value, label):
+    """Line chart of the estimate across one input, marking the selected value"""
+    # Copy of the cached curve: only the marker is drawn per request
+    fig = go.Figure(create_what_if_curve(curve, col, label))
+    fig.add_vline(x=current_value, line=dict(color="white", width=1, dash="dash"))
+    
+    return fig
+
+@cached_figure
+def create_price_by_year_chart(by_year):
+    """Median expected price per model year, with the band between the 25th and 75th percentiles"""
+    fig = go.Figure([
+        go.Scatter(x=by_year['Model_Year'], y=by_year['P75'], line=dict(width=0), showlegend=False, hoverinfo='skip'),
+        go.Scatter(x=by_year['Model_Year'], y=by_year['P25'], line=dict(width=0), fill='tonexty',
+                   fillcolor='rgba(225, 29, 72, 0.2)', name='25-75%'),
+        go.Scatter(x=by_year['Model_Year'], y=by_year['Median'], line=dict(color='#e11d48', width=3), name='Median'),
+    ])
+    
+    fig.update_layout(
+        template = TEMPLATE,
+        height = 350,
+        xaxis_title = "Model Year",
+        yaxis_title = "Expected Price ($)",
+        yaxis_tickprefix = "$"
+    )
+    
+    return fig
+
+@cached_figure
+def create_make_price_chart(by_make, top=15):
+    """Median expected price of the most registered makes"""
+    by_make = by_make.nlargest(top, 'Registrations').sort_values('Median')
+    fig = px.bar(
+        by_make,
+        x='Median',
+        y='Make',
+        orientation='h',
+        hover_data={'Registrations': ':,'},
+        labels={'Median': 'Median Expected Price ($)', 'Make': ''},
+        color_discrete_sequence=['#e11d48']
+    )
+    
+    fig.update_layout(
+        template = TEMPLATE,
+        height = 350
+    )
+    
+    return fig
+
+@cached_figure
+def create_county_chart(by_county):
+    """Registrations per county"""
+    by_county = by_county.dropna(subset=['County']).sort_values('Registrations', ascending=False)
+    fig = px.bar(
+        by_county,
+        x='County',
+        y='Registrations',
+        hover_data={'Median': ':$,.0f'},
+        color_discrete_sequence=px.colors.qualitative.Bold,
+        text_auto=','
+    )
+    
+    fig.update_layout(
+        template = TEMPLATE,
+        height = 300
+    )
+    
+    return fig
+
+@cached_figure
+def create_range_price_chart(tiles, tile_px):
+    """Hexagonal tiles of registrations over electric range and expected price"""
+    fig = go.Figure(go.Scatter(
+        x=tiles['x'],
+        y=tiles['y'],
+        mode='markers',
+        marker=dict(symbol='hexagon', size=tile_px, color=tiles['count'], line=dict(width=0),
+                    colorscale=['#2a2a2a', '#ff8fa3', '#e11d48'], colorbar=dict(title="Cars")),
+        hovertemplate="%{x:.0f} mi, $%{y:,.0f}: %{marker.color:,} cars<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        template = TEMPLATE,
+        height = 350,
+        xaxis_title = "Electric Range (miles)",
+        yaxis_title = "Expected Price ($)",
+        yaxis_tickprefix = "$"
+    )
+    
+    return fig
+
+@cached_figure
+def create_year_distribution_chart(years, prices, counts):
+    """Heatmap of registrations per model year and expected price band"""
+    fig = go.Figure(go.Heatmap(
+        x=years,
+        y=prices,
+        z=counts,
+        colorscale=['#1a1a1a', '#ff8fa3', '#e11d48'],
+        colorbar=dict(title="Cars"),
+        hovertemplate="%{x:.0f}, ~$%{y:,.0f}: %{z:,} cars<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        template = TEMPLATE,
+        height = 350,
+        xaxis_title = "Model Year",
+        yaxis_title = "Expected Price ($)",
+        yaxis_tickprefix = "$"
     )
     
     return fig
 
-def get_similar_cars(make, model, year, price):
-    """Get similar cars for comparison"""
-    # This is a simplified version - in a real app, you'd query your database
-    similar_cars = pd.DataFrame({
-        'Make': ['TESLA', 'BMW', 'NISSAN', 'CHEVROLET', 'FORD'],
-        'Model': ['MODEL 3', 'I3', 'LEAF', 'BOLT EV', 'MUSTANG MACH-E'],
-        'Year': [2022, 2021, 2020, 2022, 2021],
-        'Price': [45000, 35000, 28000, 32000, 42000]
-    })
+def get_similar_cars(make, model, year, electric_range, k=5):
+    """The k registered cars closest to the input, with their median expected price"""
+    similar_cars = load_similar_car_index().query(make, model, year, electric_range, k)
+    similar_cars['Car'] = (similar_cars['Model'] + " " + similar_cars['Year'].astype(str)
+                           + " (" + similar_cars['Range'].astype(str) + " mi)")
     
     return similar_cars
 
+def get_price_gauge(price, make, ev_type):
+    """Price gauge against the narrowest Make / EV type segment with enough registrations"""
+    segment, quantiles = segment_quantiles(load_price_quantiles(), make, ev_type)
+    return create_price_gauge(price, quantiles, segment)
+
+def get_dataset_figures():
+    """Vehicle, make and model counts from the prebuilt aggregate cube and vocabulary, formatted for display"""
+    try:
+        vocab = load_vocabulary()
+        n_vehicles = int(load_price_cube()['cells']['count'].sum())
+    except Exception:
+        # Artifacts missing and no dataset to build them from
+        return "—", "—", "—"
+    n_models = sum(len(models) for models in vocab['cars'].values())
+    return f"{n_vehicles:,}", f"{len(vocab['cars']):,}", f"{n_models:,}"
+
+def render_market_overview():
+    """Registrations and expected prices sliced from the precomputed aggregate cube"""
+    st.markdown("""
+    <div class="card">
+        <h2>📊 Market Overview</h2>
+        <p style="color: #888;">Registrations and expected prices across the whole dataset</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    price_cube = load_price_cube()
+    ev_types = st.multiselect("⚡ Electric Vehicle Type", price_cube['cells']['Electric_Vehicle_Type'].cat.categories.tolist(),
+                              placeholder="All types")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("<h4>Expected Price by Model Year</h4>", unsafe_allow_html=True)
+        by_year = slice_price_cube(price_cube, ['Model_Year'], Electric_Vehicle_Type=ev_types)
+        st.plotly_chart(create_price_by_year_chart(by_year), use_container_width=True, theme=None)
+    with col2:
+        st.markdown("<h4>Median Price of the Most Registered Makes</h4>", unsafe_allow_html=True)
+        by_make = slice_price_cube(price_cube, ['Make'], Electric_Vehicle_Type=ev_types)
+        st.plotly_chart(create_make_price_chart(by_make), use_container_width=True, theme=None)
+    
+    # Both charts are drawn from prebuilt bins: one value per bin, sized to
+    # the half-width columns, whatever the dataset size
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("<h4>Electric Range vs Expected Price</h4>", unsafe_allow_html=True)
+        range_tiles = load_range_tiles()
+        tiles = select_range_tiles(range_tiles, ev_types)
+        st.plotly_chart(create_range_price_chart(tiles, range_tiles['tile_px']), use_container_width=True, theme=None)
+    with col2:
+        st.markdown("<h4>Price Distribution by Model Year</h4>", unsafe_allow_html=True)
+        # One column per model year, price bands sized to the chart height
+        _, n_bands = grid_shape(height=350, cell_px=8)
+        years, prices, counts = slice_price_bands(price_cube, ['Model_Year'], n_bands, Electric_Vehicle_Type=ev_types)
+        years = years['Model_Year'].to_numpy(dtype=np.float64)
+        known = np.isfinite(years)
+        if known.any():
+            st.plotly_chart(create_year_distribution_chart(years[known], prices, counts[known].T),
+                            use_container_width=True, theme=None)
+    
+    st.markdown("<h4>Registrations by County</h4>", unsafe_allow_html=True)
+    by_county = slice_price_cube(price_cube, ['County'], Electric_Vehicle_Type=ev_types)
+    st.plotly_chart(create_county_chart(by_county), use_container_width=True, theme=None)
+
+def render_batch_valuation(prices):
+    """CSV upload that prices a whole inventory and offers the result for download"""
+    st.markdown("""
+    <div class="card">
+        <h3>📂 Batch Valuation</h3>
+        <p style="color: #888;">Upload an inventory CSV with one car per row to price all of them at once</p>
+    </div>
+    """, unsafe_allow_html=True)
+    st.caption("Required columns: " + ", ".join(input_cols))
+
+    uploaded = st.file_uploader("Inventory CSV", type="csv", key="batch_upload")
+    if uploaded is None:
+        return
+    if prices is None:
+        st.warning("Model not loaded. Batch valuation is unavailable in the demonstration mode.")
+        return
+
+    # The uploader keeps its file across reruns: price it once, on request, and reuse the result
+    result = st.session_state.get('batch_result')
+    if result is None or result['file_id'] != uploaded.file_id:
+        if not st.button("💰 Price inventory", use_container_width=True):
+            return
+        result = _price_inventory(uploaded, prices)
+        st.session_state['batch_result'] = result
+
+    for problem in result['problems']:
+        st.warning(problem)
+    if result['error']:
+        st.error(result['error'])
+        return
+    priced = result['priced']
+    st.success(f"Priced {len(priced):,} cars")
+    st.dataframe(priced.head(100), use_container_width=True)
+    st.download_button("⬇️ Download priced inventory", result['csv'],
+                       file_name=f"priced_{uploaded.name}", mime="text/csv")
+
+
+def _price_inventory(uploaded, prices):
+    """Priced inventory of the upload, its CSV bytes and the problems met, for the session state"""
+    result = {'file_id': uploaded.file_id, 'problems': [], 'error': None, 'priced': None, 'csv': None}
+    # Batch rows skip the single-car cache and go straight to the model
+    predictor, encoder = prices.predictor, prices.encoder
+
+    try:
+        inventory = pd.read_csv(uploaded)
+    except Exception as e:
+        result['error'] = f"Could not read the uploaded file: {e}"
+        return result
+
+    columns = inventory.columns
+    inventory, result['problems'] = prepare_batch(inventory, encoder)
+    if inventory.empty:
+        result['error'] = "No rows to price."
+        return result
+
+    progress = st.progress(0.0, text=f"Pricing {len(inventory):,} cars...")
+    priced = score_batch(predictor, encoder, inventory,
+                         progress=lambda done, total: progress.progress(done / total, text=f"Priced {done:,} / {total:,} cars"))
+    progress.empty()
+    result['priced'] = priced
+    # The download keeps the uploaded file's own column names
+    result['csv'] = restore_columns(priced, columns).to_csv(index=False).encode('utf-8')
+    return result
+
 # === APP LAYOUT ===
 # Main container
 main_container = st.container()
@@ -588,32 +809,13 @@ with main_container:
         </div>
         """, unsafe_allow_html=True)
     
-    # Custom tabs
-    st.markdown("""
-    <div class="tab-nav">
-        <div class="tab tab-active" id="tab-home" onclick="switchTab('home')">
-            <span style="color: #e11d48;">●</span> Home
-        </div>
-        <div class="tab" id="tab-analysis" onclick="switchTab('analysis')">
-            Analysis
-        </div>
-        <div class="tab" id="tab-prediction" onclick="switchTab('prediction')">
-            Prediction
-        </div>
-    </div>
-    
-    <script>
-    function switchTab(tabName) {
-        // This would normally handle tab switching, but we'll use Streamlit's own tab system
-    }
-    </script>
-    """, unsafe_allow_html=True)
+    # View selector: unlike st.tabs, only the selected view's code runs on a rerun
+    views = ["Home", "Analysis", "Prediction"]
+    default_view = next((v for v in views if v.lower() == current_page), "Home")
+    view = st.radio("View", views, index=views.index(default_view), horizontal=True, label_visibility="collapsed")
     
-    # Create tabs using Streamlit
-    tab1, tab2, tab3 = st.tabs(["Home", "Analysis", "Prediction"])
-    
-    # === HOME TAB ===
-    with tab1:
+    # === HOME VIEW ===
+    if view == "Home":
         st.markdown("""
         <div class="card">
             <h2>Are you curious about the potential market price of a car?</h2>
@@ -621,10 +823,12 @@ with main_container:
         </div>
         """, unsafe_allow_html=True)
         
+        n_vehicles, n_makes, n_models = get_dataset_figures()
+        
         # Key metrics
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric(label="Models Analyzed", value="1,500+", delta="24 new")
+            st.metric(label="Models Analyzed", value=n_models)
         with col2:
             st.metric(label="Prediction Accuracy", value="98.8%", delta="↑ 1.2%")
         with col3:
@@ -685,24 +889,24 @@ with main_container:
             
         </div>
         """, unsafe_allow_html=True)
-        st.markdown("""
+        st.markdown(f"""
 <div class="divider"></div>
 
 <div style="display: flex; justify-content: space-between; margin-top: 15px;">
     <div style="text-align: center; flex: 1;">
-        <h3 style="font-size: 2rem; margin: 0;">1,500+</h3>
+        <h3 style="font-size: 2rem; margin: 0;">{n_vehicles}</h3>
         <p style="color: #888;">Vehicles</p>
     </div>
     <div style="text-align: center; flex: 1;">
-        <h3 style="font-size: 2rem; margin: 0;">35+</h3>
+        <h3 style="font-size: 2rem; margin: 0;">{n_makes}</h3>
         <p style="color: #888;">Makes</p>
     </div>
     <div style="text-align: center; flex: 1;">
-        <h3 style="font-size: 2rem; margin: 0;">120+</h3>
+        <h3 style="font-size: 2rem; margin: 0;">{n_models}</h3>
         <p style="color: #888;">Models</p>
     </div>
     <div style="text-align: center; flex: 1;">
-        <h3 style="font-size: 2rem; margin: 0;">10+</h3>
+        <h3 style="font-size: 2rem; margin: 0;">{len(input_cols)}</h3>
         <p style="color: #888;">Features</p>
     </div>
 </div>
@@ -754,8 +958,10 @@ with main_container:
         </div>
         """, unsafe_allow_html=True)
     
-    # === ANALYSIS TAB ===
-    with tab2:
+    # === ANALYSIS VIEW ===
+    elif view == "Analysis":
+        render_market_overview()
+        
         st.markdown("""
         <div class="card">
             <h2>🔍 Model Evaluation Overview</h2>
@@ -767,7 +973,13 @@ with main_container:
         # Feature importance visualization
         st.markdown("<h3>Feature Importance</h3>", unsafe_allow_html=True)
         st.markdown("<p>These features have the most impact on determining a car's price:</p>", unsafe_allow_html=True)
-        st.plotly_chart(create_feature_importance_chart(), use_container_width=True)
+        importance = load_importance()
+        if importance is not None:
+            st.plotly_chart(create_feature_importance_chart(importance), use_container_width=True, theme=None)
+            st.caption(f"Permutation importance on {importance['n_rows']:,} registrations "
+                       f"(baseline R² {importance['baseline_r2']:.3f})")
+        else:
+            st.info("Feature importances have not been computed for this model yet: run `python build_artifacts.py`.")
         
         # Model performance table with improved styling
         st.markdown("""
@@ -923,8 +1135,10 @@ with main_container:
 """, unsafe_allow_html=True)
 
     
-    # === PREDICTION TAB ===
-    with tab3:
+    # === PREDICTION VIEW ===
+    elif view == "Prediction":
+        prices, vocab = load_prediction_resources()
+
         # Main layout with sidebar-like left panel and content area
         col1, col2 = st.columns([1, 2])
         
@@ -936,40 +1150,45 @@ with main_container:
             </div>
             """, unsafe_allow_html=True)
             
-            # Vehicle filters with improved styling
-            with st.form("prediction_form"):
-                # Vehicle filters
-                make = st.selectbox("🚘 Make", onehot_uniques['Make'])
-                model_car = st.selectbox("📦 Model", onehot_uniques['Model'])
-                
-                # Year slider
-                min_year = int(min(scale_uniques['Model_Year'])) if scale_uniques['Model_Year'] else 2010
-                max_year = int(max(scale_uniques['Model_Year'])) if scale_uniques['Model_Year'] else 2023
+            # Vehicle filters, outside the form so each choice narrows the next
+            # from the prebuilt Make -> Model index
+            make = st.selectbox("🚘 Make", list(vocab['cars']))
+            model_car = st.selectbox("📦 Model", list(vocab['cars'][make]))
+            car = vocab['cars'][make][model_car]
+            
+            # Year slider, over the years this model was registered (a single year needs no slider)
+            min_year, max_year = car['Model_Year']
+            if min_year == max_year:
+                model_year = min_year
+                st.caption(f"📅 Model Year: {model_year} (the only year registered for this model)")
+            else:
                 model_year = st.slider("📅 Model Year", min_year, max_year, value=min_year + (max_year - min_year) // 2)
-                
-                # EV type
-                ev_type = st.selectbox("⚡ Electric Vehicle Type", onehot_uniques['Electric_Vehicle_Type'])
-                
-                # CAFV eligibility
-                cafv = st.selectbox("♻️ CAFV Eligibility", onehot_uniques['Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility'])
-                
-                # Electric range with improved slider
-                min_range = int(min(scale_uniques['Electric_Range'])) if scale_uniques['Electric_Range'] else 50
-                max_range = int(max(scale_uniques['Electric_Range'])) if scale_uniques['Electric_Range'] else 400
-                electric_range = st.slider("🔋 Electric Range (miles)", min_range, max_range, value=min_range + (max_range - min_range) // 2)
-                
-                # Location details
-                st.markdown("<div class='divider'></div>", unsafe_allow_html=True)
-                st.markdown("<h4>Location Details</h4>", unsafe_allow_html=True)
-                
-                county = st.selectbox("🏙️ County", freq_uniques['County'])
-                city = st.selectbox("📍 City", freq_uniques['City'])
-                utility = st.selectbox("🏢 Electric Utility", freq_uniques['Electric_Utility'])
-                district = st.selectbox("🏛️ Legislative District", freq_uniques['Legislative_District'])
-                
-                # Submit button
-                st.markdown("<div style='padding-top: 20px;'>", unsafe_allow_html=True)
-                submit_button = st.form_submit_button(label="Estimate Price", use_container_width=True)
+            
+            # EV type
+            ev_type = st.selectbox("⚡ Electric Vehicle Type", car['Electric_Vehicle_Type'])
+            
+            # CAFV eligibility
+            cafv = st.selectbox("♻️ CAFV Eligibility", car['Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility'])
+            
+            # Electric range with improved slider
+            min_range, max_range = car['Electric_Range']
+            if min_range == max_range:
+                electric_range = min_range
+                st.caption(f"🔋 Electric Range: {electric_range} miles (the only range registered for this model)")
+            else:
+                electric_range = st.slider("🔋 Electric Range (miles)", min_range, max_range,
+                                           value=min_range + (max_range - min_range) // 2)
+            
+            # Location details
+            st.markdown("<div class='divider'></div>", unsafe_allow_html=True)
+            st.markdown("<h4>Location Details</h4>", unsafe_allow_html=True)
+            
+            # One ZIP code fills in the four location fields from the prebuilt index
+            zip_code = st.selectbox("📮 ZIP Code", list(vocab['zip_codes']))
+            location = vocab['zip_codes'][zip_code]
+            county, city = location['County'], location['City']
+            utility, district = location['Electric_Utility'], location['Legislative_District']
+            st.caption(f"{city}, {county} County · {utility} · Legislative District {district}")
         
         with col2:
             st.markdown("""
@@ -981,214 +1200,43 @@ with main_container:
             """, unsafe_allow_html=True)
             
             # Car image - using a dynamic image based on make/model
-            car_image_url = get_car_image_url(make, model_car) if 'make' in locals() else "https://images.unsplash.com/photo-1593941707882-a5bba14938c7?w=800"
-            st.image(car_image_url, use_column_width=True)
-            
-            # Create input DataFrame for prediction
-            if submit_button:
-                # Show loading animation
-                st.markdown("""
-                <div style="display: flex; justify-content: center; margin: 20px 0;">
-                    <div class="loading"></div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Create raw input DataFrame
-            input_df = pd.DataFrame({
-            'Make': [make], 'Model': [model_car], 'Model_Year': [model_year],
-            'Electric_Vehicle_Type': [ev_type],
-            'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility': [cafv],
-            'Electric_Range': [electric_range], 'County': [county],
-            'Electric_Utility': [utility], 'Legislative_District': [district], 'City': [city]
-        })
-
-        # === Frequency Encoding ===
-        for col in freq_cols:
-            mapping = df[col].value_counts().to_dict()
-            input_df[col + '_freq'] = input_df[col].map(mapping).fillna(0)
-
-        freq_scaled = MinMaxScaler()
-        input_df[[col + '_freq' for col in freq_cols]] = freq_scaled.fit_transform(input_df[[col + '_freq' for col in freq_cols]])
-        input_df.drop(columns=freq_cols, inplace=True)
-
-        # === One-Hot Encoding ===
-        encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        encoded_array = encoder.fit(df[onehot_cols]).transform(input_df[onehot_cols])
-        encoded_df = pd.DataFrame(encoded_array, columns=encoder.get_feature_names_out(onehot_cols))
-
-        input_df = input_df.drop(columns=onehot_cols).reset_index(drop=True)
-        encoded_df = encoded_df.reset_index(drop=True)
-        input_df = pd.concat([input_df, encoded_df], axis=1)
-
-        # === Scaling ===
-        scaler = StandardScaler()
-        input_df[scale_cols] = scaler.fit(df[scale_cols]).transform(input_df[scale_cols])
-
-        # === Reorder Columns ===
-        correct_column_order = ['Model_Year','Electric_Range','County_freq','Electric_Utility_freq','Legislative_District_freq','City_freq','Make_AUDI','Make_AZURE DYNAMICS',
-    'Make_BENTLEY',
-    'Make_BMW',
-    'Make_CADILLAC',
-    'Make_CHEVROLET',
-    'Make_CHRYSLER',
-    'Make_DODGE',
-    'Make_FIAT',
-    'Make_FISKER',
-    'Make_FORD',
-    'Make_HONDA',
-    'Make_HYUNDAI',
-    'Make_JAGUAR',
-    'Make_JEEP',
-    'Make_KIA',
-    'Make_LAND ROVER',
-    'Make_LINCOLN',
-    'Make_MERCEDES-BENZ',
-    'Make_MINI',
-    'Make_MITSUBISHI',
-    'Make_NISSAN',
-    'Make_POLESTAR',
-    'Make_PORSCHE',
-    'Make_SMART',
-    'Make_SUBARU',
-    'Make_TESLA',
-    'Make_TH!NK',
-    'Make_TOYOTA',
-    'Make_VOLKSWAGEN',
-    'Make_VOLVO',
-    'Make_WHEEGO ELECTRIC CARS',
-    'Model_$16.36K',
-    'Model_330E',
-    'Model_500',
-    'Model_530E',
-    'Model_530E XDRIVE',
-    'Model_740E XDRIVE',
-    'Model_745E',
-    'Model_918 SPYDER',
-    'Model_A3',
-    'Model_A7',
-    'Model_A8 E',
-    'Model_ACCORD',
-    'Model_AVIATOR',
-    'Model_B-CLASS',
-    'Model_BENTAYGA',
-    'Model_BOLT EV',
-    'Model_C-CLASS',
-    'Model_C-MAX',
-    'Model_CARAVAN',
-    'Model_CAYENNE',
-    'Model_CITY',
-    'Model_CLARITY',
-    'Model_CORSAIR',
-    'Model_COUNTRYMAN',
-    'Model_CROSSTREK HYBRID AWD',
-    'Model_CT6',
-    'Model_E-GOLF',
-    'Model_E-TRON',
-    'Model_E-TRON SPORTBACK',
-    'Model_ELR',
-    'Model_EQ FORTWO',
-    'Model_ESCAPE',
-    'Model_FOCUS',
-    'Model_FORTWO',
-    'Model_FORTWO ELECTRIC DRIVE',
-    'Model_FUSION',
-    'Model_GLC-CLASS',
-    'Model_GLE-CLASS',
-    'Model_HARDTOP',
-    'Model_I-MIEV',
-    'Model_I-PACE',
-    'Model_I3',
-    'Model_I8',
-    'Model_IONIQ',
-    'Model_KARMA',
-    'Model_KONA',
-    'Model_LEAF',
-    'Model_LIFE',
-    'Model_MODEL 3',
-    'Model_MODEL S',
-    'Model_MODEL X',
-    'Model_MODEL Y',
-    'Model_NIRO',
-    'Model_NIRO ELECTRIC',
-    'Model_NIRO PLUG-IN HYBRID',
-    'Model_OPTIMA',
-    'Model_OPTIMA PLUG-IN HYBRID',
-    'Model_OUTLANDER',
-    'Model_PACIFICA',
-    'Model_PANAMERA',
-    'Model_PRIUS PLUG-IN',
-    'Model_PRIUS PLUG-IN HYBRID',
-    'Model_PRIUS PRIME',
-    'Model_PS2',
-    'Model_Q5',
-    'Model_Q5 E',
-    'Model_RANGE ROVER',
-    'Model_RANGE ROVER SPORT',
-    'Model_RANGER',
-    'Model_RAV4',
-    'Model_RAV4 PRIME',
-    'Model_ROADSTER',
-    'Model_S-CLASS',
-    'Model_S60',
-    'Model_S90',
-    'Model_SANTA FE',
-    'Model_SONATA',
-    'Model_SONATA PLUG-IN HYBRID',
-    'Model_SORENTO',
-    'Model_SOUL',
-    'Model_SOUL EV',
-    'Model_SPARK',
-    'Model_TAYCAN',
-    'Model_TRANSIT CONNECT ELECTRIC',
-    'Model_TUCSON',
-    'Model_VOLT',
-    'Model_WRANGLER',
-    'Model_X3',
-    'Model_X5',
-    'Model_XC60',
-    'Model_XC60 AWD',
-    'Model_XC60 AWD PHEV',
-    'Model_XC90',
-    'Model_XC90 AWD',
-    'Model_XC90 AWD PHEV',
-    'Electric_Vehicle_Type_Battery Electric Vehicle (BEV)',
-    'Electric_Vehicle_Type_Plug-in Hybrid Electric Vehicle (PHEV)',
-    'Electric_Vehicle_Type_nan',
-    'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_Clean Alternative Fuel Vehicle Eligible',
-    'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_Not eligible due to low battery range',
-    'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_nan']  # Replace with your full list as shown earlier
+            st.image(str(get_car_image(make, model_car)), use_column_width=True)
 
-        for col in correct_column_order:
-            if col not in input_df.columns:
-                input_df[col] = 0
-        input_df = input_df[correct_column_order]
+        inputs = {
+            'Make': make, 'Model': model_car, 'Model_Year': model_year,
+            'Electric_Vehicle_Type': ev_type,
+            'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility': cafv,
+            'Electric_Range': electric_range, 'County': county,
+            'Electric_Utility': utility, 'Legislative_District': district, 'City': city
+        }
 
 
 
-# === Prediction Tab Content ===
-with tab3:
+# === Prediction View Content ===
+if view == "Prediction":
     st.header("🔮 Price Prediction Tool")
 
+    curves = None
     col1, col2, col3 = st.columns([1, 1, 1])
 
     with col2:
         if st.button("Estimate"):
             try:
-                # Ensure correct column order for prediction
-                for col in correct_column_order:
-                    if col not in input_df.columns:
-                        input_df[col] = 0
-                input_df = input_df[correct_column_order]
-
                 # Predict and display the price
-                if model is not None:
-                    predicted_price = model.predict(input_df)[0]
+                # Cached per input combination, shared by every session
+                if prices is not None:
+                    predicted_price = prices.predict(inputs)
                     st.markdown(f"""
                         <div class="prediction-result">
                             <h3>💰 Estimated Price:</h3>
                             <p style="font-size: 32px; color: #e11d48;">${predicted_price * 1000:,.2f}</p>
                         </div>
                     """, unsafe_allow_html=True)
+                    # Precomputed segment quantiles: no dataset scan per request
+                    st.plotly_chart(get_price_gauge(predicted_price * 1000, make, ev_type), use_container_width=True, theme=None)
+                    # Every year and range this model was registered with, priced in one batch
+                    curves = what_if_curves(prices.predictor, prices.encoder, inputs, car_sweep_ranges(car))
+                    similar_cars = get_similar_cars(make, model_car, model_year, electric_range)
                 else:
                     st.warning("Model not loaded. This is a demonstration of the UI only.")
                     st.markdown(f"""
@@ -1200,3 +1248,20 @@ with tab3:
             except Exception as e:
                 st.error(f"Error during prediction: {e}")
                 st.info("Please check your input data and try again.")
+
+    # === What-if curves ===
+    if curves is not None:
+        st.subheader("📈 What If?")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(create_what_if_chart(curves['Model_Year'], 'Model_Year', model_year, "Model Year"),
+                            use_container_width=True, theme=None)
+        with col2:
+            st.plotly_chart(create_what_if_chart(curves['Electric_Range'], 'Electric_Range', electric_range,
+                                                 "Electric Range (miles)"), use_container_width=True, theme=None)
+
+        st.subheader("🚗 Similar Registered Cars")
+        st.plotly_chart(create_price_comparison_chart(predicted_price * 1000, similar_cars), use_container_width=True, theme=None)
+
+    st.markdown("<div class='divider'></div>", unsafe_allow_html=True)
+    render_batch_valuation(prices)
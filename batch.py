@@ -0,0 +1,79 @@
+"""Batch valuation: price every row of an inventory CSV in one pass"""
+import numpy as np
+import pandas as pd
+
+from config import MODEL_PATH, PREPROCESSOR_PATH, PRICE_SCALE
+from model_store import load_model_file
+from predictors import serving_predictor
+from preprocessing import FeatureEncoder, clean_columns, freq_cols, load_preprocessor, onehot_cols, scale_cols
+from versioning import model_version
+
+# Raw columns every uploaded row needs, in the dataset's spelling (spaces are accepted too)
+input_cols = onehot_cols + scale_cols + freq_cols
+PRICE_COLUMN = 'Estimated_Price'
+
+
+def load_scoring_resources(model_path=MODEL_PATH, preprocessor_path=PREPROCESSOR_PATH):
+    """(predictor, encoder) outside Streamlit, from the artifacts written by build_artifacts.py"""
+    preprocessor = load_preprocessor(preprocessor_path)
+    if preprocessor is None:
+        raise FileNotFoundError(f"No preprocessor at {preprocessor_path}: run `python build_artifacts.py` first")
+    model = load_model_file(model_path)
+    encoder = FeatureEncoder(preprocessor)
+    encoder.check_model(model)
+    return serving_predictor(model, encoder, model_version(model_path)), encoder
+
+
+def prepare_batch(frame, encoder):
+    """Validate an inventory frame and coerce its columns to the encoder's types
+
+    Returns (frame, problems): rows that cannot be priced are dropped and
+    each problem is a human-readable message.
+    """
+    frame = clean_columns(frame.copy())
+    missing = [col for col in input_cols if col not in frame.columns]
+    if missing:
+        return frame.iloc[:0], [f"Missing columns: {', '.join(missing)}"]
+
+    problems = []
+    for col in scale_cols:
+        frame[col] = pd.to_numeric(frame[col], errors='coerce')
+    for col, categories in zip(freq_cols, encoder.freq_categories):
+        if pd.api.types.is_numeric_dtype(categories):
+            frame[col] = pd.to_numeric(frame[col], errors='coerce')
+
+    invalid = frame[scale_cols].isna().any(axis=1)
+    if invalid.any():
+        problems.append(f"{int(invalid.sum()):,} rows without a numeric {' / '.join(scale_cols)} were skipped")
+        frame = frame[~invalid]
+
+    for col in onehot_cols:
+        unknown = ~frame[col].isin(encoder.hot_index[col].keys())
+        if unknown.any():
+            problems.append(f"{int(unknown.sum()):,} rows have a {col} the model was not trained on")
+    return frame.reset_index(drop=True), problems
+
+
+def score_batch(predictor, encoder, frame, chunk_size=2000, progress=None):
+    """Copy of `frame` with an Estimated_Price column in dollars
+
+    Rows are encoded and scored `chunk_size` at a time, so memory stays
+    bounded; `progress(done, total)` is called after each chunk.
+    """
+    prices = np.empty(len(frame))
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size]
+        prices[start:start + len(chunk)] = predictor.predict(encoder.encode_batch(chunk))
+        if progress is not None:
+            progress(start + len(chunk), len(frame))
+
+    priced = frame.copy()
+    priced[PRICE_COLUMN] = (prices * PRICE_SCALE).round(2)
+    return priced
+
+
+def restore_columns(priced, columns):
+    """`priced` with the input's own column names (before clean_columns) back, for output files"""
+    priced = priced.copy()
+    priced.columns = list(columns) + [PRICE_COLUMN]
+    return priced
@@ -0,0 +1,118 @@
+"""Offline build of the artifacts the apps load at startup
+
+Run it once after the dataset or the model changes:
+
+    python build_artifacts.py --dataset Electric_cars_dataset.csv
+"""
+import argparse
+from pathlib import Path
+
+import joblib
+
+from config import (DATASET_PATH, IMAGE_DIR, IMPORTANCE_PATH, LATTICE_MAX_DEVIATION, LATTICE_PATH, MODEL_PATH, MODEL_STORE_DIR,
+                    PREPROCESSOR_PATH, PRICE_CUBE_PATH, PRICE_QUANTILES_PATH, RANGE_TILES_PATH, SNAPSHOT_PATH,
+                    SURROGATE_MAX_DEVIATION, SURROGATE_PATH, VOCABULARY_PATH)
+from image_assets import build_image_assets
+from importance import compute_importance, read_importance, save_importance
+from lattice import build_lattice, measure_lattice, save_lattice
+from model_store import export_model_store
+from predictors import fit_surrogate, make_predictor, save_surrogate
+from price_cube import read_price_cube, refresh_price_cube, save_price_cube
+from price_quantiles import read_price_quantiles, refresh_price_quantiles, save_price_quantiles
+from preprocessing import FeatureEncoder, build_preprocessor, dataset_cols, save_preprocessor
+from range_tiles import build_range_tiles, save_range_tiles
+from snapshot import read_snapshot, write_snapshot
+from versioning import file_digest, model_version
+from vocabulary import build_vocabulary, save_vocabulary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the artifacts the apps load at startup")
+    parser.add_argument('--dataset', type=Path, default=DATASET_PATH, help="raw registration CSV")
+    # Opt-in: on the bundled model even 3000 of its 3528 support vectors miss the deviation threshold
+    parser.add_argument('--surrogate-components', type=int, default=0,
+                        help="landmarks of the kernel-approximation surrogate (0, the default, skips it)")
+    parser.add_argument('--lattice-rank', type=int, default=24,
+                        help="location basis size of the price lattice (0 to skip it)")
+    parser.add_argument('--lattice-range-step', type=int, default=4, help="Electric_Range grid step of the price lattice")
+    parser.add_argument('--importance-rows', type=int, default=2000,
+                        help="holdout rows for permutation importance (0 to skip it)")
+    parser.add_argument('--force-importance', action='store_true',
+                        help="recompute permutation importance even if the model and dataset did not change")
+    parser.add_argument('--skip-images', action='store_true',
+                        help="do not download the car pictures (the generic picture is drawn locally)")
+    args = parser.parse_args()
+
+    n_rows = write_snapshot(args.dataset, SNAPSHOT_PATH)
+    print(f"Snapshot ({n_rows:,} rows) -> {SNAPSHOT_PATH}")
+    df = read_snapshot(SNAPSHOT_PATH)
+
+    preprocessor = build_preprocessor(df)
+    save_preprocessor(preprocessor, PREPROCESSOR_PATH)
+    print(f"Preprocessor v{preprocessor['version']} ({len(df):,} rows) -> {PREPROCESSOR_PATH}")
+
+    save_vocabulary(build_vocabulary(df), VOCABULARY_PATH)
+    print(f"Vocabulary -> {VOCABULARY_PATH}")
+
+    price_quantiles, n_counted = refresh_price_quantiles(read_price_quantiles(PRICE_QUANTILES_PATH), df)
+    save_price_quantiles(price_quantiles, PRICE_QUANTILES_PATH)
+    print(f"Price quantiles ({len(price_quantiles['quantiles']):,} segments, {n_counted:,} new rows counted) "
+          f"-> {PRICE_QUANTILES_PATH}")
+
+    manifest = build_image_assets(IMAGE_DIR, download=not args.skip_images)
+    n_bytes = sum(entry['bytes'] for entry in [*manifest['images'].values(), manifest['fallback']])
+    print(f"Car pictures ({len(manifest['images'])} cars + fallback, {n_bytes / 2 ** 10:,.0f} KiB) -> {IMAGE_DIR}")
+
+    price_cube, n_counted = refresh_price_cube(read_price_cube(PRICE_CUBE_PATH), df)
+    save_price_cube(price_cube, PRICE_CUBE_PATH)
+    print(f"Price cube ({len(price_cube['cells']):,} cells, {n_counted:,} new rows counted) -> {PRICE_CUBE_PATH}")
+
+    range_tiles = build_range_tiles(df)
+    save_range_tiles(range_tiles, RANGE_TILES_PATH)
+    print(f"Range / price tiles ({len(range_tiles['tiles']):,} tiles) -> {RANGE_TILES_PATH}")
+
+    model = joblib.load(MODEL_PATH)
+    encoder = FeatureEncoder(preprocessor)
+    encoder.check_model(model)
+
+    manifest = export_model_store(model, model_version())
+    print(f"Model store ({manifest['arrays']['support_vectors']['shape'][0]:,} support vectors, "
+          f"verified against {MODEL_PATH.name}) -> {MODEL_STORE_DIR}")
+
+    rows = encoder.encode_batch(df[dataset_cols])
+
+    if args.surrogate_components:
+        surrogate = fit_surrogate(model, encoder, rows, n_components=args.surrogate_components)
+        save_surrogate(surrogate, model_version())
+        report = surrogate['report']
+        status = "enabled" if report['max_abs_deviation'] < SURROGATE_MAX_DEVIATION else "disabled"
+        print(f"Surrogate ({report['n_components']} landmarks) -> {SURROGATE_PATH}: "
+              f"max deviation ${report['max_abs_deviation']:,.2f}, RMSE ${report['rmse']:,.2f} "
+              f"on {report['n_holdout']:,} rows, {status} (threshold ${SURROGATE_MAX_DEVIATION:,.2f})")
+
+    if args.lattice_rank:
+        lattice = build_lattice(model, encoder, rows, range_step=args.lattice_range_step, rank=args.lattice_rank)
+        lattice['report'] = report = measure_lattice(lattice, make_predictor(model, encoder), rows)
+        save_lattice(lattice, model_version())
+        deviation = max(report['max_abs_deviation'], report['max_abs_deviation_offgrid'])
+        status = "enabled" if deviation < LATTICE_MAX_DEVIATION else "disabled"
+        print(f"Price lattice ({report['n_combos']:,} cars x {report['n_locations']:,} locations, rank {report['rank']}, "
+              f"{LATTICE_PATH.stat().st_size / 2 ** 20:,.1f} MiB on disk vs {MODEL_PATH.stat().st_size / 2 ** 20:,.1f} MiB "
+              f"for the model) -> {LATTICE_PATH}: max deviation ${report['max_abs_deviation']:,.2f}, "
+              f"${report['max_abs_deviation_offgrid']:,.2f} between range grid points, RMSE ${report['rmse']:,.2f}, "
+              f"{status} (threshold ${LATTICE_MAX_DEVIATION:,.2f})")
+
+    if args.importance_rows:
+        version, dataset_digest = model_version(), file_digest(args.dataset)
+        importance = None if args.force_importance else read_importance(IMPORTANCE_PATH, version, dataset_digest)
+        if importance is None:
+            importance = compute_importance(make_predictor(model, encoder), encoder, df, n_rows=args.importance_rows)
+            save_importance(importance, version, dataset_digest)
+            print(f"Permutation importance ({importance['n_rows']:,} rows x {importance['n_repeats']} repeats) "
+                  f"-> {IMPORTANCE_PATH}")
+        else:
+            print(f"Permutation importance up to date for this model and dataset -> {IMPORTANCE_PATH}")
+
+
+if __name__ == '__main__':
+    main()
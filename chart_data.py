@@ -0,0 +1,62 @@
+"""Server-side binning of raw rows for charts
+
+st.plotly_chart ships every point of a figure to the browser, so charts over
+the registration rows are aggregated first, into hexagonal tiles for
+scatter-like data. The resolution follows the size of the chart on screen (a
+few pixels per tile), so the payload stays bounded whatever the dataset size.
+"""
+import numpy as np
+import pandas as pd
+
+# Width in pixels assumed for a chart when the caller does not know better
+DEFAULT_WIDTH = 700
+
+
+def grid_shape(width=DEFAULT_WIDTH, height=350, cell_px=10):
+    """(columns, rows) of bins that give each bin about `cell_px` pixels on screen"""
+    return max(1, int(width // cell_px)), max(1, int(height // cell_px))
+
+
+def _finite(x, y):
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    keep = np.isfinite(x) & np.isfinite(y)
+    return x[keep], y[keep]
+
+
+def hexbin(x, y, gridsize=(70, 20), bounds=None):
+    """Centers and counts of the non-empty hexagonal tiles covering the points
+
+    Same tiling as matplotlib's hexbin: two rectangular lattices offset by
+    half a cell, each point going to the nearer center. `gridsize` is the
+    number of tiles across x and y and `bounds` the ((x_min, x_max),
+    (y_min, y_max)) they cover, the data's own by default; with the same
+    bounds, tiles of separate sets of points add up.
+    """
+    x, y = _finite(x, y)
+    if bounds is None and len(x):
+        bounds = ((x.min(), x.max()), (y.min(), y.max()))
+    if bounds is not None:
+        (x_min, x_max), (y_min, y_max) = bounds
+        inside = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        x, y = x[inside], y[inside]
+    if not len(x):
+        return pd.DataFrame({'x': [], 'y': [], 'count': []})
+    nx, ny = gridsize
+    sx = max(x_max - x_min, 1e-9) / nx
+    sy = max(y_max - y_min, 1e-9) / ny
+    u, v = (x - x_min) / sx, (y - y_min) / sy
+
+    i1, j1 = np.round(u), np.round(v)
+    i2, j2 = np.floor(u), np.floor(v)
+    on_first = (u - i1) ** 2 + 3 * (v - j1) ** 2 < (u - i2 - 0.5) ** 2 + 3 * (v - j2 - 0.5) ** 2
+    cx = np.where(on_first, i1, i2 + 0.5)
+    cy = np.where(on_first, j1, j2 + 0.5)
+
+    # Both lattices on one integer grid of half cells
+    cells = (2 * cx).astype(np.int64) * (2 * ny + 3) + (2 * cy).astype(np.int64)
+    unique, counts = np.unique(cells, return_counts=True)
+    return pd.DataFrame({
+        'x': x_min + unique // (2 * ny + 3) / 2 * sx,
+        'y': y_min + unique % (2 * ny + 3) / 2 * sy,
+        'count': counts,
+    })
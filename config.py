@@ -0,0 +1,40 @@
+"""Paths and settings shared by the apps and the offline build script"""
+from pathlib import Path
+
+# === PATHS ===
+BASE_DIR = Path(__file__).resolve().parent
+DATASET_PATH = BASE_DIR / 'Electric_cars_dataset.csv'
+MODEL_PATH = BASE_DIR / 'svr_model.joblib'
+
+# Everything under this directory is produced by `python build_artifacts.py`
+ARTIFACT_DIR = BASE_DIR / 'artifacts'
+PREPROCESSOR_PATH = ARTIFACT_DIR / 'preprocessor.joblib'
+SNAPSHOT_PATH = ARTIFACT_DIR / 'dataset.feather'
+VOCABULARY_PATH = ARTIFACT_DIR / 'vocabulary.json'
+SURROGATE_PATH = ARTIFACT_DIR / 'surrogate.joblib'
+MODEL_STORE_DIR = ARTIFACT_DIR / 'model'
+LATTICE_PATH = ARTIFACT_DIR / 'lattice.joblib'
+IMPORTANCE_PATH = ARTIFACT_DIR / 'importance.json'
+PRICE_QUANTILES_PATH = ARTIFACT_DIR / 'price_quantiles.joblib'
+PRICE_CUBE_PATH = ARTIFACT_DIR / 'price_cube.feather'
+RANGE_TILES_PATH = ARTIFACT_DIR / 'range_tiles.joblib'
+IMAGE_DIR = ARTIFACT_DIR / 'images'
+
+# === MODEL ===
+# The model predicts prices in thousands of dollars
+PRICE_SCALE = 1000
+
+# The kernel-approximation surrogate replaces the exact SVR only when its
+# largest deviation on the holdout sample, in dollars, is below this value
+SURROGATE_MAX_DEVIATION = 50.0
+
+# Same for the price lattice; the worse of its on-grid and interpolated
+# deviations is compared
+LATTICE_MAX_DEVIATION = 50.0
+
+# Single-car predictions kept by the shared LRU cache
+PREDICTION_CACHE_SIZE = 4096
+
+# On-disk store behind that cache, kept across restarts (None to disable it)
+PREDICTION_STORE_PATH = ARTIFACT_DIR / 'predictions.sqlite'
+PREDICTION_STORE_MAX_ROWS = 100_000
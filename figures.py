@@ -0,0 +1,33 @@
+"""Plotly theme of the apps and a process-wide cache of built figures
+
+The dark theme is registered once as the `car_price` template instead of
+being re-applied with update_layout on every chart. Charts using it are
+rendered with st.plotly_chart(..., theme=None): Streamlit's own theme would
+override the template's colors.
+
+Building a figure (plotly express above all) costs tens of milliseconds,
+mostly in validation, while handing a built one to st.plotly_chart costs a
+couple. Chart functions wrapped in cached_figure are therefore keyed on
+their inputs and shared by every session, like the loaders' resources.
+Charts with a per-request overlay cache their base figure and copy it
+before adding the overlay: cached figures are shared, never mutate them.
+"""
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+TEMPLATE = 'car_price'
+
+_template = go.layout.Template(pio.templates['plotly_dark'])
+_template.layout.update(
+    paper_bgcolor = "rgba(0,0,0,0)",
+    plot_bgcolor = "rgba(26,26,26,1)",
+    font = {'color': "white", 'family': "Arial"},
+    margin = dict(l=20, r=20, t=30, b=20)
+)
+pio.templates[TEMPLATE] = _template
+
+
+def cached_figure(func):
+    """Cache a chart function's figure by its arguments, across reruns and sessions"""
+    return st.cache_resource(max_entries=128, show_spinner=False)(func)
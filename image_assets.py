@@ -0,0 +1,174 @@
+"""Local store of pre-resized car pictures, so the apps never fetch images at request time
+
+build_image_assets downloads (or reads) each source picture once, resizes it
+to at most THUMBNAIL_SIZE, re-encodes it as a progressive JPEG and saves it
+under the SHA-256 of its bytes, with a manifest mapping Make/Model keys to
+files. A generic picture is drawn locally when its source cannot be fetched,
+so the store always has a fallback. The apps serve these files with
+st.image: no network access, and a bounded size per view.
+"""
+import hashlib
+import io
+import json
+import logging
+import urllib.request
+from pathlib import Path
+
+from config import IMAGE_DIR
+
+logger = logging.getLogger(__name__)
+
+IMAGE_ASSETS_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+# Largest (width, height) of a stored picture and its JPEG quality
+THUMBNAIL_SIZE = (800, 450)
+JPEG_QUALITY = 80
+
+# Original pictures per Make/Model, as URLs or local paths
+image_sources = {
+    ('TESLA', 'MODEL 3'): "https://images.unsplash.com/photo-1560958089-b8a1929cea89?w=800",
+    ('TESLA', 'MODEL S'): "https://images.unsplash.com/photo-1620891549027-942fdc95d3f5?w=800",
+    ('TESLA', 'MODEL X'): "https://images.unsplash.com/photo-1566055909643-a51b4271d2bf?w=800",
+    ('TESLA', 'MODEL Y'): "https://images.unsplash.com/photo-1617704548623-340376564e68?w=800",
+    ('BMW', 'I3'): "https://images.unsplash.com/photo-1580273916550-e323be2ae537?w=800",
+    ('BMW', 'I8'): "https://images.unsplash.com/photo-1556189250-72ba954cfc2b?w=800",
+    ('NISSAN', 'LEAF'): "https://images.unsplash.com/photo-1593055357429-62eaf3b259cc?w=800",
+}
+
+# Shown for cars without a picture of their own, and on the calculator pages
+FALLBACK_SOURCE = "https://images.unsplash.com/photo-1593941707882-a5bba14938c7?w=800"
+HERO_SOURCE = "https://www.neodrift.in/cdn/shop/articles/best-resale-cars-featured.jpg?v=1722222661"
+
+
+def _key(make, model):
+    return f"{make}/{model}"
+
+
+def _read_source(source, timeout=20):
+    """Bytes of a local file or URL"""
+    if not str(source).startswith(('http://', 'https://')):
+        return Path(source).read_bytes()
+    request = urllib.request.Request(source, headers={'User-Agent': 'car-price-app/1.0'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def _thumbnail(data):
+    """JPEG bytes of the picture, resized to fit THUMBNAIL_SIZE"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        image.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _placeholder():
+    """Generic picture drawn locally: dark card with the app's accent colour"""
+    from PIL import Image, ImageDraw
+
+    width, height = THUMBNAIL_SIZE
+    image = Image.new('RGB', THUMBNAIL_SIZE, '#1a1a1a')
+    draw = ImageDraw.Draw(image)
+    draw.rounded_rectangle([width * 0.2, height * 0.45, width * 0.8, height * 0.65], radius=30, fill='#e11d48')
+    draw.rounded_rectangle([width * 0.32, height * 0.32, width * 0.66, height * 0.5], radius=30, fill='#e11d48')
+    for x in (width * 0.32, width * 0.68):
+        draw.ellipse([x - 35, height * 0.6, x + 35, height * 0.6 + 70], fill='#2a2a2a', outline='#888888', width=6)
+    out = io.BytesIO()
+    image.save(out, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _store(data, directory):
+    """Save the bytes under their content hash and return their manifest entry"""
+    from PIL import Image
+
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{digest[:16]}.jpg"
+    (directory / name).write_bytes(data)
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+    return {'file': name, 'sha256': digest, 'width': width, 'height': height, 'bytes': len(data)}
+
+
+def build_image_assets(directory=IMAGE_DIR, sources=None, download=True):
+    """Resize every source picture into `directory` and write the manifest
+
+    With download=False, or when a source cannot be read, the picture
+    already in the store is kept, if any; the fallback is then drawn locally.
+    """
+    sources = image_sources if sources is None else sources
+    directory.mkdir(parents=True, exist_ok=True)
+    # Pictures of the current store by key (Make/Model keys always contain a '/')
+    previous = read_image_assets(directory)
+    kept = {}
+    if previous is not None:
+        kept = {**previous['images'], 'fallback': previous['fallback'], 'hero': previous['hero']}
+
+    def fetch(key, source):
+        if download:
+            try:
+                return _store(_thumbnail(_read_source(source)), directory)
+            except Exception as error:
+                logger.warning("Could not fetch the picture at %s: %s", source, error)
+        if key not in kept:
+            return None
+        return {name: value for name, value in kept[key].items() if name != 'path'}
+
+    images = {}
+    for (make, model), source in sources.items():
+        entry = fetch(_key(make, model), source)
+        if entry is not None:
+            images[_key(make, model)] = entry
+    fallback = fetch('fallback', FALLBACK_SOURCE) or _store(_placeholder(), directory)
+
+    manifest = {
+        'version': IMAGE_ASSETS_VERSION,
+        'images': images,
+        'fallback': fallback,
+        'hero': fetch('hero', HERO_SOURCE) or fallback,
+    }
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+
+    # Drop pictures no longer referenced by the manifest
+    referenced = {entry['file'] for entry in [*images.values(), fallback, manifest['hero']]}
+    for path in directory.glob('*.jpg'):
+        if path.name not in referenced:
+            path.unlink()
+    return manifest
+
+
+def read_image_assets(directory=IMAGE_DIR):
+    """The manifest with absolute paths, skipping files that are missing or fail their checksum; None if unusable"""
+    manifest_path = directory / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    manifest = json.loads(manifest_path.read_text())
+    if manifest.get('version') != IMAGE_ASSETS_VERSION:
+        return None
+
+    def verified(entry):
+        path = directory / entry['file']
+        if not path.exists() or hashlib.sha256(path.read_bytes()).hexdigest() != entry['sha256']:
+            logger.warning("Picture %s is missing or corrupt", path)
+            return None
+        return {**entry, 'path': path}
+
+    fallback = verified(manifest['fallback'])
+    if fallback is None:
+        return None
+    images = {key: verified(entry) for key, entry in manifest['images'].items()}
+    return {
+        **manifest,
+        'images': {key: entry for key, entry in images.items() if entry is not None},
+        'fallback': fallback,
+        'hero': verified(manifest['hero']) or fallback,
+    }
+
+
+def car_image_path(image_assets, make, model):
+    """Local picture of the Make/Model, or the generic one"""
+    return image_assets['images'].get(_key(make, model), image_assets['fallback'])['path']
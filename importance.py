@@ -0,0 +1,83 @@
+"""Permutation importance of the raw input columns, computed offline
+
+Each raw column (Make, Model, County, ...) is shuffled across a holdout
+sample, the sample is re-encoded and scored, and the drop in R^2 against
+Expected_Price is that column's importance. Shuffling the raw column groups
+all of its one-hot or frequency features together. Columns are spread over
+a process pool; the result is saved with the model and dataset digests and
+only recomputed when one of them changes.
+"""
+import json
+from multiprocessing import Pool
+
+import numpy as np
+
+from batch import input_cols
+from config import IMPORTANCE_PATH
+
+IMPORTANCE_VERSION = 1
+
+# Set in each worker process by _init_worker
+_task = None
+
+
+def _r2(y_true, y_pred):
+    return 1 - np.sum((y_true - y_pred) ** 2) / np.sum((y_true - y_true.mean()) ** 2)
+
+
+def _init_worker(task):
+    global _task
+    _task = task
+
+
+def _column_importance(col):
+    predictor, encoder, sample, baseline, n_repeats, random_state = _task
+    rng = np.random.default_rng([random_state, input_cols.index(col)])
+    drops = []
+    for _ in range(n_repeats):
+        shuffled = sample.copy()
+        shuffled[col] = rng.permutation(shuffled[col].to_numpy())
+        drops.append(baseline - _r2(sample['Expected_Price'].to_numpy(), predictor.predict(encoder.encode_batch(shuffled))))
+    return col, float(np.mean(drops)), float(np.std(drops))
+
+
+def compute_importance(predictor, encoder, df, n_rows=2000, n_repeats=5, workers=None, random_state=0):
+    """{column: (mean, std) drop in R^2} over a random sample of `df`"""
+    sample = df.dropna(subset=['Expected_Price']).sample(min(n_rows, len(df)), random_state=random_state)
+    sample = sample[input_cols + ['Expected_Price']].reset_index(drop=True)
+    baseline = _r2(sample['Expected_Price'].to_numpy(), predictor.predict(encoder.encode_batch(sample)))
+
+    task = (predictor, encoder, sample, baseline, n_repeats, random_state)
+    with Pool(workers, initializer=_init_worker, initargs=(task,)) as pool:
+        results = pool.map(_column_importance, input_cols)
+    return {
+        'baseline_r2': float(baseline),
+        'n_rows': len(sample),
+        'n_repeats': n_repeats,
+        'columns': {col: {'mean': mean, 'std': std} for col, mean, std in results},
+    }
+
+
+def save_importance(importance, model_version, dataset_digest, path=IMPORTANCE_PATH):
+    """Write the importances as JSON, tagged with the inputs they were computed from"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        **importance,
+        'version': IMPORTANCE_VERSION,
+        'model_version': model_version,
+        'dataset_digest': dataset_digest,
+    }, indent=2))
+
+
+def read_importance(path=IMPORTANCE_PATH, model_version=None, dataset_digest=None):
+    """The saved importances, or None when missing, outdated or computed from other inputs"""
+    if not path.exists():
+        return None
+    importance = json.loads(path.read_text())
+    if importance.get('version') != IMPORTANCE_VERSION:
+        return None
+    if model_version is not None and importance.get('model_version') != model_version:
+        return None
+    if dataset_digest is not None and importance.get('dataset_digest') != dataset_digest:
+        return None
+    return importance
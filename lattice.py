@@ -0,0 +1,193 @@
+"""Precomputed price lattice for the RBF SVR
+
+The lattice covers every car combination (Make x Model x EV type x CAFV)
+and location seen in the dataset, every integer Model_Year and a grid of
+Electric_Range values, so a prediction is a table lookup instead of a kernel
+sum over the support vectors.
+
+A plain price grid per car combination would ignore the four location
+frequency features, which move prices by thousands of dollars. Since the
+RBF kernel factorizes over disjoint feature groups, the location factor
+exp(-g ||loc - s_loc||^2) is a (locations x support vectors) matrix, and it
+is numerically low-rank. Truncating its SVD to `rank` terms turns the model
+into
+
+    f(car, loc, year, range) = b + sum_k loc_basis[loc, k] * prices[car, year, range, k]
+
+so the lattice stores `rank` basis prices per grid point and a lookup is a
+linear interpolation along Electric_Range followed by a dot product of
+length `rank`. Years are looked up exactly: one year is wide compared to
+the kernel, so fractional years go to the fallback predictor, like cars and
+locations outside the lattice. The deviation from the exact model is
+measured when the lattice is built.
+"""
+import os
+
+import joblib
+import numpy as np
+
+from config import LATTICE_PATH, PRICE_SCALE
+from preprocessing import scale_cols
+
+LATTICE_VERSION = 2
+
+
+def _rbf_factor(values, support, gamma):
+    """exp(-gamma ||v - s||^2) for every (row of values, row of support)"""
+    sq_dist = (np.einsum('ij,ij->i', values, values)[:, None] + np.einsum('ij,ij->i', support, support)[None, :]
+               - 2 * values @ support.T)
+    return np.exp(-gamma * np.maximum(sq_dist, 0))
+
+
+def build_lattice(model, encoder, rows, range_step=4, rank=24, dtype=np.float32):
+    """Price lattice over the car combinations and locations seen in the encoded `rows`"""
+    support = np.asarray(model.support_vectors_, dtype=np.float64)
+    gamma = float(model._gamma)
+    hot_index = np.setdiff1d(np.arange(encoder.n_features), encoder.dense_index)
+
+    combos = np.unique(rows[:, hot_index], axis=0)
+    # Dual coefficients folded into the car factor
+    combo_factors = _rbf_factor(combos, support[:, hot_index], gamma) * model.dual_coef_[0]
+
+    locations = np.unique(rows[:, encoder.freq_index], axis=0)
+    u, s, vt = np.linalg.svd(_rbf_factor(locations, support[:, encoder.freq_index], gamma), full_matrices=False)
+    rank = min(rank, len(s))
+    loc_basis = u[:, :rank] * s[:rank]
+    sv_basis = vt[:rank].T
+
+    grids, axis_factors = {}, {}
+    for position, (col, step) in enumerate(zip(scale_cols, (1, range_step))):
+        index, mean, std = encoder.scale_index[position], encoder.scale_mean[position], encoder.scale_std[position]
+        raw = rows[:, index] * std + mean
+        grid = np.arange(np.floor(raw.min()), np.ceil(raw.max()) + step, step)
+        grids[col] = grid
+        axis_factors[col] = _rbf_factor(((grid - mean) / std)[:, None], support[:, [index]], gamma)
+
+    years, ranges = axis_factors['Model_Year'], axis_factors['Electric_Range']
+    # (years x ranges) rows of the per-support-vector year * range factor
+    year_range = (years[:, None, :] * ranges[None, :, :]).reshape(-1, len(support))
+    prices = np.empty((len(combos), len(years), len(ranges), rank), dtype=dtype)
+    for c, factor in enumerate(combo_factors):
+        prices[c] = ((year_range * factor) @ sv_basis).reshape(len(years), len(ranges), rank)
+
+    return {
+        'version': LATTICE_VERSION,
+        # The scaler and frequency tables are baked into the grids and locations
+        'encoder_fingerprint': encoder.fingerprint(),
+        'intercept': float(model.intercept_[0]),
+        'hot_index': hot_index,
+        'freq_index': encoder.freq_index,
+        'scale_index': encoder.scale_index,
+        'scale_mean': encoder.scale_mean,
+        'scale_std': encoder.scale_std,
+        'combos': combos,
+        'locations': locations,
+        'loc_basis': loc_basis.astype(dtype),
+        'grids': grids,
+        'prices': prices,
+    }
+
+
+class LatticePredictor:
+    """Scores encoded rows from the lattice, handing rows outside it to `fallback`"""
+
+    def __init__(self, lattice, fallback=None):
+        self.lattice = lattice
+        self.fallback = fallback
+        self.combo_ids = {row.tobytes(): i for i, row in enumerate(lattice['combos'])}
+        self.location_ids = {row.tobytes(): i for i, row in enumerate(lattice['locations'])}
+
+    def _axis(self, rows, position, col):
+        """Lower grid position and interpolation weight on one axis, -1 when outside the grid"""
+        lattice = self.lattice
+        grid = lattice['grids'][col]
+        raw = rows[:, lattice['scale_index'][position]] * lattice['scale_std'][position] + lattice['scale_mean'][position]
+        offset = (raw - grid[0]) / (grid[1] - grid[0]) if len(grid) > 1 else raw - grid[0]
+        # Undo the float noise of scaling and unscaling integer inputs
+        rounded = np.round(offset)
+        offset = np.where(np.abs(offset - rounded) < 1e-6, rounded, offset)
+        lower = np.clip(np.floor(offset), 0, len(grid) - 1).astype(np.intp)
+        weight = offset - lower
+        lower[(offset < 0) | (offset > len(grid) - 1)] = -1
+        return lower, weight
+
+    def predict(self, rows):
+        rows = np.asarray(rows, dtype=np.float64)
+        lattice = self.lattice
+        prices = lattice['prices']
+        combo = np.array([self.combo_ids.get(row.tobytes(), -1) for row in rows[:, lattice['hot_index']]],
+                         dtype=np.intp)
+        location = np.array([self.location_ids.get(row.tobytes(), -1) for row in rows[:, lattice['freq_index']]],
+                            dtype=np.intp)
+        (year, year_weight), (rng, rng_weight) = [self._axis(rows, position, col)
+                                                  for position, col in enumerate(scale_cols)]
+
+        inside = (combo >= 0) & (location >= 0) & (year >= 0) & (year_weight == 0) & (rng >= 0)
+        out = np.empty(len(rows))
+        if inside.any():
+            c, y, r = combo[inside], year[inside], rng[inside]
+            weight = rng_weight[inside, None]
+            r1 = np.minimum(r + 1, prices.shape[2] - 1)
+            basis = (1 - weight) * prices[c, y, r] + weight * prices[c, y, r1]
+            out[inside] = np.einsum('ij,ij->i', basis, lattice['loc_basis'][location[inside]],
+                                    dtype=np.float64) + lattice['intercept']
+        if not inside.all():
+            if self.fallback is None:
+                raise ValueError(f"{int((~inside).sum())} rows fall outside the price lattice")
+            out[~inside] = self.fallback.predict(rows[~inside])
+        return out
+
+
+def measure_lattice(lattice, exact, rows, n_rows=20000, n_offgrid=2000, random_state=0):
+    """Size of the lattice and its deviation from `exact`, in dollars
+
+    max_abs_deviation and rmse are measured on up to `n_rows` of `rows`;
+    max_abs_deviation_offgrid on some of them with random fractional ranges,
+    which bounds the interpolation error.
+    """
+    rng = np.random.default_rng(random_state)
+    if len(rows) > n_rows:
+        rows = rows[rng.choice(len(rows), n_rows, replace=False)]
+    predictor = LatticePredictor(lattice)
+    on_rows = (predictor.predict(rows) - exact.predict(rows)) * PRICE_SCALE
+
+    # Same cars, places and years with fractional ranges, to bound the interpolation error
+    offgrid = rows[rng.integers(len(rows), size=min(n_offgrid, len(rows)))].copy()
+    position = scale_cols.index('Electric_Range')
+    grid = lattice['grids']['Electric_Range']
+    raw = rng.uniform(grid[0], grid[-1], size=len(offgrid))
+    offgrid[:, lattice['scale_index'][position]] = ((raw - lattice['scale_mean'][position])
+                                                    / lattice['scale_std'][position])
+    off_grid = (predictor.predict(offgrid) - exact.predict(offgrid)) * PRICE_SCALE
+
+    return {
+        'n_combos': len(lattice['combos']),
+        'n_locations': len(lattice['locations']),
+        'rank': lattice['loc_basis'].shape[1],
+        'nbytes': lattice['prices'].nbytes + lattice['loc_basis'].nbytes,
+        'max_abs_deviation': float(np.abs(on_rows).max()),
+        'rmse': float(np.sqrt(np.mean(on_rows ** 2))),
+        'max_abs_deviation_offgrid': float(np.abs(off_grid).max()),
+    }
+
+
+def save_lattice(lattice, model_version, path=LATTICE_PATH):
+    """Persist the lattice, tagged with the version of the model it was built from"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Servers memory-map the old lattice: truncating it in place would crash them, so write beside it and swap
+    tmp_path = path.with_name(path.name + '.tmp')
+    joblib.dump({**lattice, 'model_version': model_version}, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_lattice(model_version, encoder, path=LATTICE_PATH):
+    """The saved lattice for this model version and preprocessing, or None"""
+    if not path.exists():
+        return None
+    # Memory-mapped, so server processes share the price tables like the model store
+    lattice = joblib.load(path, mmap_mode='r')
+    if lattice.get('version') != LATTICE_VERSION or lattice.get('model_version') != model_version:
+        return None
+    if lattice.get('encoder_fingerprint') != encoder.fingerprint():
+        return None
+    return lattice
@@ -0,0 +1,250 @@
+"""Process-wide loading of the model, dataset and encoder shared by every session
+
+Each loader is cached with st.cache_resource, so all sessions of a server
+process share one object. The cache key includes the file's modification
+time and size, so replacing a file on disk loads the new version on the next
+rerun. Objects returned here are shared: treat them as read-only.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from config import (DATASET_PATH, IMAGE_DIR, IMPORTANCE_PATH, LATTICE_PATH, MODEL_PATH, MODEL_STORE_DIR, PREPROCESSOR_PATH,
+                    PRICE_CUBE_PATH, PRICE_QUANTILES_PATH, RANGE_TILES_PATH, SNAPSHOT_PATH, SURROGATE_PATH, VOCABULARY_PATH)
+from model_store import MANIFEST_NAME, load_model_file
+from preprocessing import (FeatureEncoder, build_preprocessor, clean_columns, dataset_cols, load_preprocessor,
+                           save_preprocessor)
+from image_assets import MANIFEST_NAME as IMAGE_MANIFEST_NAME, build_image_assets, read_image_assets
+from importance import read_importance
+from prediction_cache import PredictionCache
+from prediction_store import open_prediction_store
+from predictors import serving_predictor
+from price_cube import build_price_cube, read_price_cube, save_price_cube
+from price_quantiles import build_price_quantiles, read_price_quantiles, save_price_quantiles
+from range_tiles import build_range_tiles, read_range_tiles, save_range_tiles
+from similar_cars import SimilarCarIndex
+from snapshot import read_snapshot
+from versioning import model_version, serving_version
+from vocabulary import build_vocabulary, read_vocabulary, save_vocabulary
+
+logger = logging.getLogger(__name__)
+
+# name -> details of the last load (seconds, bytes on disk, when it happened)
+load_metrics = {}
+
+# The prediction store behind the cached PredictionCache, closed when that cache is replaced
+_prediction_stores = {}
+
+
+def file_stamp(path):
+    """Modification time and size of a file, or None when it does not exist"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def _timed(name, path):
+    start = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - start
+    stamp = file_stamp(path)
+    load_metrics[name] = {
+        'path': str(path),
+        'seconds': seconds,
+        'bytes': stamp[1] if stamp else None,
+        'loaded_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    logger.info("Loaded %s from %s in %.3fs", name, path, seconds)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_model(path, stamp, store_stamp):
+    with _timed('model', path):
+        return load_model_file(path)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_dataset(path, stamp):
+    with _timed('dataset', path):
+        if path.suffix == '.feather':
+            return read_snapshot(path)
+        return clean_columns(pd.read_csv(path, usecols=lambda name: name.replace(' ', '_') in dataset_cols))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_encoder(model_stamp, preprocessor_stamp, _model):
+    with _timed('encoder', PREPROCESSOR_PATH):
+        preprocessor = load_preprocessor()
+        if preprocessor is None:
+            # Artifacts not built yet: fit from the dataset once and save
+            preprocessor = build_preprocessor(load_dataset())
+            save_preprocessor(preprocessor)
+        encoder = FeatureEncoder(preprocessor)
+        encoder.check_model(_model)
+        return encoder
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_predictor(model_stamp, preprocessor_stamp, surrogate_stamp, lattice_stamp, _model, _encoder):
+    with _timed('predictor', MODEL_PATH):
+        return serving_predictor(_model, _encoder, model_version())
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_prediction_cache(model_stamp, preprocessor_stamp, surrogate_stamp, lattice_stamp, _predictor, _encoder):
+    # The new cache replaces the previous one (max_entries=1): stop the old store's writer with it
+    _close_prediction_store()
+    store = _prediction_stores['current'] = open_prediction_store(serving_version())
+    return PredictionCache(_predictor, _encoder, store=store)
+
+
+def _close_prediction_store():
+    store = _prediction_stores.pop('current', None)
+    if store is not None:
+        store.close()
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_similar_car_index(path, stamp):
+    with _timed('similar_cars', path):
+        return SimilarCarIndex(load_dataset(path))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_importance(path, stamp, model_stamp):
+    with _timed('importance', path):
+        return read_importance(path, model_version=model_version())
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_price_quantiles(path, stamp):
+    with _timed('price_quantiles', path):
+        price_quantiles = read_price_quantiles(path)
+        if price_quantiles is None:
+            price_quantiles = build_price_quantiles(load_dataset())
+            save_price_quantiles(price_quantiles, path)
+        return price_quantiles
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_price_cube(path, stamp):
+    with _timed('price_cube', path):
+        price_cube = read_price_cube(path)
+        if price_cube is None:
+            price_cube = build_price_cube(load_dataset())
+            save_price_cube(price_cube, path)
+        return price_cube
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_range_tiles(path, stamp):
+    with _timed('range_tiles', path):
+        range_tiles = read_range_tiles(path)
+        if range_tiles is None:
+            range_tiles = build_range_tiles(load_dataset())
+            save_range_tiles(range_tiles, path)
+        return range_tiles
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_image_assets(directory, stamp):
+    with _timed('image_assets', directory / IMAGE_MANIFEST_NAME):
+        image_assets = read_image_assets(directory)
+        if image_assets is None:
+            # Never download while serving: only the locally drawn fallback
+            build_image_assets(directory, download=False)
+            image_assets = read_image_assets(directory)
+        return image_assets
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_vocabulary(path, stamp):
+    with _timed('vocabulary', path):
+        vocab = read_vocabulary(path)
+        if vocab is None:
+            vocab = build_vocabulary(load_dataset())
+            save_vocabulary(vocab, path)
+        return vocab
+
+
+def load_model(path=MODEL_PATH):
+    """The SVR model, memory-mapped from the model store when it was exported, else unpickled"""
+    return _load_model(path, file_stamp(path), file_stamp(MODEL_STORE_DIR / MANIFEST_NAME))
+
+
+def load_dataset(path=None):
+    """The columns the apps use from the dataset, from the columnar snapshot when one was built"""
+    if path is None:
+        path = SNAPSHOT_PATH if SNAPSHOT_PATH.exists() else DATASET_PATH
+    return _load_dataset(path, file_stamp(path))
+
+
+def load_encoder(model):
+    """The FeatureEncoder for `model`, built from the saved preprocessor"""
+    return _load_encoder(file_stamp(MODEL_PATH), file_stamp(PREPROCESSOR_PATH), model)
+
+
+def load_predictor(model, encoder):
+    """The lattice or surrogate when they are within their deviation thresholds, else the fastest exact predictor"""
+    return _load_predictor(file_stamp(MODEL_PATH), file_stamp(PREPROCESSOR_PATH), file_stamp(SURROGATE_PATH),
+                           file_stamp(LATTICE_PATH), model, encoder)
+
+
+def load_prediction_cache(predictor, encoder):
+    """The LRU of single-car prices shared by every session, warmed from the on-disk prediction store"""
+    return _load_prediction_cache(file_stamp(MODEL_PATH), file_stamp(PREPROCESSOR_PATH), file_stamp(SURROGATE_PATH),
+                                  file_stamp(LATTICE_PATH), predictor, encoder)
+
+
+def load_similar_car_index(path=None):
+    """Nearest-car index over the dataset, built once per process and per dataset version"""
+    if path is None:
+        path = SNAPSHOT_PATH if SNAPSHOT_PATH.exists() else DATASET_PATH
+    return _load_similar_car_index(path, file_stamp(path))
+
+
+def load_importance(path=IMPORTANCE_PATH):
+    """Permutation importances computed by build_artifacts.py for the current model, or None"""
+    return _load_importance(path, file_stamp(path), file_stamp(MODEL_PATH))
+
+
+def load_price_quantiles(path=PRICE_QUANTILES_PATH):
+    """Expected_Price quantiles per segment for the price gauge, without touching the dataset once built"""
+    return _load_price_quantiles(path, file_stamp(path))
+
+
+def load_price_cube(path=PRICE_CUBE_PATH):
+    """Registrations and price aggregates per Make, Model_Year, County and EV type for the dashboards"""
+    return _load_price_cube(path, file_stamp(path))
+
+
+def load_range_tiles(path=RANGE_TILES_PATH):
+    """Registrations per EV type and Electric_Range / Expected_Price tile for the dashboards"""
+    return _load_range_tiles(path, file_stamp(path))
+
+
+def load_image_assets(directory=IMAGE_DIR):
+    """Manifest of the local car pictures resized by build_artifacts.py"""
+    return _load_image_assets(directory, file_stamp(directory / IMAGE_MANIFEST_NAME))
+
+
+def load_vocabulary(path=VOCABULARY_PATH):
+    """Dropdown categories and slider ranges, without touching the dataset once built"""
+    return _load_vocabulary(path, file_stamp(path))
+
+
+def clear_caches():
+    """Drop every cached object so the next call reloads from disk"""
+    for loader in (_load_model, _load_dataset, _load_encoder, _load_predictor, _load_prediction_cache,
+                   _load_similar_car_index, _load_importance, _load_price_quantiles, _load_price_cube,
+                   _load_range_tiles, _load_image_assets, _load_vocabulary):
+        loader.clear()
+    _close_prediction_store()
+    load_metrics.clear()
@@ -0,0 +1,152 @@
+"""Memory-mapped export of the SVR model
+
+joblib.load unpickles the support vectors into private memory in every
+server process. The store keeps the fitted arrays as raw .npy files (numpy
+aligns their data to 64 bytes) next to a small JSON manifest with shapes,
+dtypes, SHA-256 checksums and the scalar parameters. Loading memory-maps the
+files read-only, so it takes milliseconds and every process on the machine
+shares the same page-cache pages.
+
+Running servers keep those mappings, so an export never rewrites a file in
+place: each array goes to a new file named after its checksum and the
+manifest is swapped in atomically. Files of the previous export stay until
+the next one, for servers that read the old manifest just before the swap.
+"""
+import json
+import os
+
+import joblib
+import numpy as np
+
+from config import MODEL_PATH, MODEL_STORE_DIR
+from versioning import file_digest
+from versioning import model_version as current_model_version
+
+MODEL_STORE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+
+class StoredModel:
+    """The fitted attributes of an RBF SVR, backed by memory-mapped arrays"""
+    kernel = 'rbf'
+
+    def __init__(self, manifest, arrays):
+        self.manifest = manifest
+        # Saved in Fortran order: rows of support_vectors_.T, one feature each, are contiguous
+        self.support_vectors_ = arrays['support_vectors']
+        self.dual_coef_ = arrays['dual_coef']
+        self.intercept_ = arrays['intercept']
+        self._gamma = manifest['gamma']
+        self.n_features_in_ = manifest['n_features_in']
+        if manifest['feature_names'] is not None:
+            self.feature_names_in_ = np.array(manifest['feature_names'], dtype=object)
+
+    def predict(self, X, chunk_size=1024):
+        """Dense RBF decision function, the reference the fast predictors are checked against"""
+        X = np.asarray(X, dtype=np.float64)
+        sv_sq_norm = np.einsum('ij,ij->i', self.support_vectors_, self.support_vectors_)
+        out = np.empty(len(X))
+        for start in range(0, len(X), chunk_size):
+            rows = X[start:start + chunk_size]
+            sq_dist = (np.einsum('ij,ij->i', rows, rows)[:, None] + sv_sq_norm[None, :]
+                       - 2 * rows @ self.support_vectors_.T)
+            np.maximum(sq_dist, 0, out=sq_dist)
+            out[start:start + chunk_size] = np.exp(-self._gamma * sq_dist) @ self.dual_coef_[0] + self.intercept_[0]
+        return out
+
+
+def _model_arrays(model):
+    return {
+        'support_vectors': np.asfortranarray(model.support_vectors_),
+        'dual_coef': np.ascontiguousarray(model.dual_coef_),
+        'intercept': np.ascontiguousarray(model.intercept_),
+    }
+
+
+def export_model_store(model, model_version, directory=MODEL_STORE_DIR):
+    """Write the model's arrays and manifest, then check the store reloads bit-for-bit"""
+    if getattr(model, 'kernel', None) != 'rbf' or not hasattr(model, 'support_vectors_'):
+        raise ValueError("Only fitted RBF SVR models can be exported to the model store")
+
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest_path = directory / MANIFEST_NAME
+    previous = json.loads(manifest_path.read_text()) if manifest_path.exists() else {'arrays': {}}
+
+    files = {}
+    for name, array in _model_arrays(model).items():
+        tmp_path = directory / f'{name}.npy.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array, allow_pickle=False)
+        digest = file_digest(tmp_path)
+        path = directory / f'{name}-{digest[:16]}.npy'
+        os.replace(tmp_path, path)
+        files[name] = {
+            'file': path.name,
+            'shape': list(array.shape),
+            'dtype': array.dtype.str,
+            'sha256': digest,
+        }
+
+    names = getattr(model, 'feature_names_in_', None)
+    manifest = {
+        'version': MODEL_STORE_VERSION,
+        'model_version': model_version,
+        'kernel': model.kernel,
+        'gamma': float(model._gamma),
+        'n_features_in': int(model.n_features_in_),
+        'feature_names': None if names is None else [str(name) for name in names],
+        'arrays': files,
+    }
+    tmp_path = manifest_path.with_name(MANIFEST_NAME + '.tmp')
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, manifest_path)
+
+    # Unlinking is safe for servers still mapping a file; keep the previous export for late readers
+    kept = {spec['file'] for spec in [*files.values(), *previous['arrays'].values()]}
+    for path in directory.glob('*.npy'):
+        if path.name not in kept:
+            path.unlink()
+
+    verify_model_store(model, load_model_store(model_version, directory))
+    return manifest
+
+
+def verify_model_store(model, stored):
+    """Raise ValueError unless `stored` holds exactly the same arrays and parameters as `model`"""
+    if stored is None:
+        raise ValueError("Model store is missing or was written for another model")
+    for name, array in _model_arrays(model).items():
+        loaded = getattr(stored, name + '_')
+        if loaded.dtype != array.dtype or not np.array_equal(loaded, array):
+            raise ValueError(f"Model store array {name} differs from the model")
+    if stored._gamma != float(model._gamma) or stored.n_features_in_ != model.n_features_in_:
+        raise ValueError("Model store parameters differ from the model")
+
+
+def load_model_store(model_version, directory=MODEL_STORE_DIR, verify_checksums=True):
+    """Memory-map the stored model, or None when it is missing or for another model version"""
+    manifest_path = directory / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    manifest = json.loads(manifest_path.read_text())
+    if manifest.get('version') != MODEL_STORE_VERSION or manifest.get('model_version') != model_version:
+        return None
+
+    arrays = {}
+    for name, spec in manifest['arrays'].items():
+        path = directory / spec['file']
+        if verify_checksums and file_digest(path) != spec['sha256']:
+            raise ValueError(f"Checksum mismatch for {path}")
+        array = np.load(path, mmap_mode='r', allow_pickle=False)
+        if list(array.shape) != spec['shape'] or array.dtype.str != spec['dtype']:
+            raise ValueError(f"{path} does not match its manifest entry")
+        arrays[name] = array
+    return StoredModel(manifest, arrays)
+
+
+def load_model_file(path=MODEL_PATH, directory=MODEL_STORE_DIR):
+    """The model at `path`, memory-mapped from the store when it was exported, else unpickled"""
+    stored = load_model_store(current_model_version(path), directory)
+    if stored is not None:
+        return stored
+    return joblib.load(path)
@@ -0,0 +1,87 @@
+"""Process-wide LRU cache of single-car predictions
+
+The form has ten inputs and traffic concentrates on a few popular cars, so
+the same combination is priced over and over. The cache maps the canonical
+input tuple straight to the price and skips both encoding and the model.
+One instance is shared by every session (see loaders.load_prediction_cache)
+and replaced when the model artifacts change. With a PredictionStore behind
+it, the cache starts warm and misses check the disk before the model.
+"""
+import threading
+from collections import OrderedDict
+
+from batch import input_cols
+from config import PREDICTION_CACHE_SIZE
+from preprocessing import scale_cols
+
+
+class PredictionCache:
+    """Bounded, thread-safe LRU of model outputs keyed on the raw form inputs"""
+
+    def __init__(self, predictor, encoder, maxsize=PREDICTION_CACHE_SIZE, store=None):
+        self.predictor = predictor
+        self.encoder = encoder
+        self.maxsize = maxsize
+        self.store = store
+        self._prices = OrderedDict(store.recent(maxsize) if store is not None else ())
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.store_hits = 0
+
+    @staticmethod
+    def key(values):
+        """Canonical tuple for {raw column: value}: fixed field order, numbers as floats"""
+        return tuple(float(values[col]) if col in scale_cols else values[col] for col in input_cols)
+
+    def predict(self, values):
+        """Model output for one car given as {raw column: value}, from the cache when possible"""
+        key = self.key(values)
+        with self._lock:
+            if key in self._prices:
+                self._prices.move_to_end(key)
+                self.hits += 1
+                price = self._prices[key]
+            else:
+                price = None
+                self.misses += 1
+        if price is not None:
+            if self.store is not None:
+                self.store.touch(key)
+            return price
+
+        # Scored outside the lock; two sessions missing on the same key just both compute it
+        price = self.store.get(key) if self.store is not None else None
+        if price is not None:
+            with self._lock:
+                self.store_hits += 1
+            self.store.touch(key)
+        else:
+            price = float(self.predictor.predict(self.encoder.encode_row(values))[0])
+            if self.store is not None:
+                self.store.put(key, price)
+        with self._lock:
+            self._prices[key] = price
+            self._prices.move_to_end(key)
+            while len(self._prices) > self.maxsize:
+                self._prices.popitem(last=False)
+                self.evictions += 1
+        return price
+
+    def stats(self):
+        """Hit/miss/eviction counters and the current fill"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'store_hits': self.store_hits,
+                'size': len(self._prices),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Drop every cached price and reset the counters"""
+        with self._lock:
+            self._prices.clear()
+            self.hits = self.misses = self.evictions = self.store_hits = 0
@@ -0,0 +1,176 @@
+"""SQLite-backed prediction store that outlives server restarts
+
+Every price computed by the app is written here, keyed by the version of the
+serving artifacts (versioning.serving_version) and the canonical input
+tuple. On startup the most recently used entries warm the in-memory
+PredictionCache, and in-memory misses check the store before calling the
+model. Writes go through a background thread so a
+request never waits on the disk; the table is trimmed to `max_rows` by
+dropping the least recently used entries. close() commits the queued
+writes and stops that thread once the store is replaced.
+"""
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from config import PREDICTION_STORE_MAX_ROWS, PREDICTION_STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    version TEXT NOT NULL,
+    key TEXT NOT NULL,
+    price REAL NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (version, key)
+);
+CREATE INDEX IF NOT EXISTS prices_used ON prices (used);
+"""
+
+
+# Queued by close() to stop the writer thread
+_STOP = object()
+
+
+def _encode_key(key):
+    return json.dumps(key, separators=(',', ':'), default=str)
+
+
+class PredictionStore:
+    """Persistent (artifact version, input tuple) -> price table with asynchronous writes"""
+
+    def __init__(self, version, path=PREDICTION_STORE_PATH, max_rows=PREDICTION_STORE_MAX_ROWS,
+                 batch_size=256):
+        self.version = version
+        self.path = path
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        # Held to check _closed and enqueue as one step, so nothing lands behind close()'s sentinel
+        self._lock = threading.Lock()
+        self._closed = False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        # Prices from other artifact versions can never be served again
+        connection.execute("DELETE FROM prices WHERE version != ?", (version,))
+        connection.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, name='prediction-store-writer', daemon=True)
+        self._writer.start()
+
+    def _connection(self):
+        # One connection per thread; WAL lets readers run while the writer commits
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        """Stored price for the canonical input tuple, or None"""
+        if self._closed:
+            return None
+        try:
+            row = self._connection().execute(
+                "SELECT price FROM prices WHERE version = ? AND key = ?",
+                (self.version, _encode_key(key)),
+            ).fetchone()
+        except sqlite3.Error:
+            # A locked or broken store only costs a model call
+            logger.exception("Could not read the prediction store")
+            return None
+        return None if row is None else row[0]
+
+    def put(self, key, price):
+        """Queue a price for writing; returns immediately"""
+        self._enqueue((_encode_key(key), float(price), time.time()))
+
+    def touch(self, key):
+        """Queue a last-used update so hot entries survive eviction"""
+        self._enqueue((_encode_key(key), None, time.time()))
+
+    def _enqueue(self, item):
+        with self._lock:
+            if not self._closed:
+                self._queue.put(item)
+
+    def recent(self, limit):
+        """The `limit` most recently used (key, price) pairs, most recent last"""
+        rows = self._connection().execute(
+            "SELECT key, price FROM prices WHERE version = ? ORDER BY used DESC LIMIT ?",
+            (self.version, limit),
+        ).fetchall()
+        return [(tuple(json.loads(key)), price) for key, price in reversed(rows)]
+
+    def flush(self):
+        """Block until every queued write has been committed"""
+        self._queue.join()
+
+    def close(self, timeout=5):
+        """Commit the queued writes, then stop the writer thread and close its connection
+
+        Later reads miss and later writes are dropped, for sessions still
+        holding the replaced store.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._writer.join(timeout)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            entries = batch[:-1] if stop else batch
+            try:
+                if entries:
+                    self._write(entries)
+            except sqlite3.Error:
+                logger.exception("Could not write %d entries to the prediction store", len(entries))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                self._connection().close()
+                return
+
+    def _write(self, batch):
+        connection = self._connection()
+        puts = [(self.version, key, price, used) for key, price, used in batch if price is not None]
+        touches = [(used, self.version, key) for key, price, used in batch if price is None]
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO prices (version, key, price, used) VALUES (?, ?, ?, ?)", puts)
+            connection.executemany("UPDATE prices SET used = ? WHERE version = ? AND key = ?", touches)
+            (n_rows,) = connection.execute("SELECT COUNT(*) FROM prices").fetchone()
+            if n_rows > self.max_rows:
+                connection.execute(
+                    "DELETE FROM prices WHERE rowid IN (SELECT rowid FROM prices ORDER BY used LIMIT ?)",
+                    (n_rows - self.max_rows,),
+                )
+
+
+def open_prediction_store(version, path=PREDICTION_STORE_PATH):
+    """The store for this artifact version, or None when it is disabled or the file cannot be opened"""
+    if path is None:
+        return None
+    try:
+        return PredictionStore(version, path)
+    except sqlite3.Error:
+        logger.exception("Prediction store at %s is unavailable, running without it", path)
+        return None
@@ -0,0 +1,194 @@
+"""Predictors that score rows already encoded by FeatureEncoder"""
+import logging
+
+import joblib
+import numpy as np
+
+from config import LATTICE_MAX_DEVIATION, PRICE_SCALE, SURROGATE_MAX_DEVIATION, SURROGATE_PATH
+from lattice import LatticePredictor, load_lattice
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPredictor:
+    """Plain model.predict, for models the fast paths below do not cover"""
+
+    def __init__(self, model, encoder):
+        self.model = model
+        self.encoder = encoder
+
+    def predict(self, rows):
+        return self.model.predict(self.encoder.frame(rows))
+
+
+def _take_rows(array, index):
+    """array[index], as a view when the index is a contiguous range (keeps memory-mapped arrays shared)"""
+    if len(index) and np.array_equal(index, np.arange(index[0], index[0] + len(index))):
+        return array[index[0]:index[0] + len(index)]
+    return array[index]
+
+
+class SparseRBFPredictor:
+    """Exact RBF SVR evaluation that exploits the one-hot structure of the inputs
+
+    Every encoded row has 6 dense values and at most 4 hot positions out of
+    the remaining columns. With the support-vector norms precomputed,
+
+        ||x - s||^2 = ||x||^2 + ||s||^2 - 2 (x_dense . s_dense + sum of s over x's hot columns)
+
+    costs about n_SV * 10 operations per row instead of n_SV * n_features.
+    """
+
+    def __init__(self, support, dual_coef, intercept, gamma, dense_index, chunk_size=1024):
+        support = np.asarray(support, dtype=np.float64)
+        n_features = support.shape[1]
+        # Feature-major copy, unless the support vectors already come in Fortran order (model_store.py)
+        support_T = np.ascontiguousarray(support.T)
+
+        self.dense_index = np.asarray(dense_index)
+        self.hot_index = np.setdiff1d(np.arange(n_features), self.dense_index)
+        self.gamma = float(gamma)
+        self.dual_coef = np.ascontiguousarray(dual_coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.chunk_size = chunk_size
+
+        self.sv_dense_T = np.ascontiguousarray(_take_rows(support_T, self.dense_index))
+        # Row j holds column j of the one-hot block, so a hot position is one contiguous read
+        self.sv_hot_T = np.ascontiguousarray(_take_rows(support_T, self.hot_index))
+        self.sv_sq_norm = np.einsum('ij,ij->i', support, support)
+
+    @classmethod
+    def from_model(cls, model, dense_index):
+        """Evaluator for a fitted sklearn RBF SVR"""
+        return cls(model.support_vectors_, model.dual_coef_[0], model.intercept_[0], model._gamma, dense_index)
+
+    def _predict_chunk(self, rows):
+        dense = rows[:, self.dense_index]
+        hot = rows[:, self.hot_index]
+        cross = dense @ self.sv_dense_T
+        row_sq_norm = np.einsum('ij,ij->i', dense, dense) + np.einsum('ij,ij->i', hot, hot)
+
+        # Column positions of each row's nonzero hot values (padded with zero columns)
+        n_hot = np.count_nonzero(hot, axis=1).max()
+        if n_hot:
+            slots = np.argpartition(hot == 0, n_hot - 1, axis=1)[:, :n_hot]
+            values = np.take_along_axis(hot, slots, axis=1)
+            for j in range(n_hot):
+                cross += values[:, j, None] * self.sv_hot_T[slots[:, j]]
+
+        sq_dist = row_sq_norm[:, None] + self.sv_sq_norm[None, :] - 2 * cross
+        np.maximum(sq_dist, 0, out=sq_dist)
+        return np.exp(-self.gamma * sq_dist) @ self.dual_coef + self.intercept
+
+    def predict(self, rows):
+        """Predict for an (n_rows, n_features) array, in chunks of bounded memory"""
+        rows = np.asarray(rows, dtype=np.float64)
+        if len(rows) == 0:
+            return np.empty(0)
+        return np.concatenate([self._predict_chunk(rows[start:start + self.chunk_size])
+                               for start in range(0, len(rows), self.chunk_size)])
+
+
+def make_predictor(model, encoder, check_rows=None, tolerance=1e-6):
+    """Fastest exact predictor for `model`, checked against model.predict on `check_rows`"""
+    if getattr(model, 'kernel', None) != 'rbf' or not hasattr(model, 'support_vectors_'):
+        return ModelPredictor(model, encoder)
+
+    predictor = SparseRBFPredictor.from_model(model, encoder.dense_index)
+    if check_rows is None:
+        check_rows = model.support_vectors_[:256]
+    deviation = np.abs(predictor.predict(check_rows) - model.predict(encoder.frame(check_rows))).max()
+    if deviation > tolerance:
+        raise ValueError(f"Sparse RBF predictor deviates from the model by {deviation:g}")
+    return predictor
+
+
+# === KERNEL-APPROXIMATION SURROGATE ===
+SURROGATE_VERSION = 1
+
+
+def fit_surrogate(model, encoder, rows, n_components=1024, holdout_fraction=0.2, random_state=0):
+    """Fit a Nystroem approximation that reproduces the SVR's outputs on `rows`
+
+    f(x) = K(x, landmarks) @ normalization.T @ ridge_coef + b is itself an
+    RBF expansion, so the surrogate is stored as n_components landmarks with
+    one weight each and scored by SparseRBFPredictor like the exact model,
+    at n_components / n_SV of its cost.
+    """
+    from sklearn.kernel_approximation import Nystroem
+    from sklearn.linear_model import Ridge
+
+    rng = np.random.default_rng(random_state)
+    rows = rows[rng.permutation(len(rows))]
+    n_holdout = int(len(rows) * holdout_fraction)
+    # The support vectors are valid encoded rows too; they anchor the fit where the SVR's weight is
+    train = np.vstack([rows[n_holdout:], model.support_vectors_])
+    holdout = rows[:n_holdout]
+
+    exact = make_predictor(model, encoder)
+    # Landmarks drawn from the support vectors, where the expansion already lives
+    nystroem = Nystroem(kernel='rbf', gamma=model._gamma, n_components=n_components, random_state=random_state)
+    nystroem.fit(model.support_vectors_)
+    ridge = Ridge(alpha=1e-8).fit(nystroem.transform(train), exact.predict(train))
+
+    surrogate = {
+        'version': SURROGATE_VERSION,
+        'landmarks': nystroem.components_,
+        'weights': nystroem.normalization_.T @ ridge.coef_,
+        'intercept': float(ridge.intercept_),
+        'gamma': float(model._gamma),
+        'dense_index': encoder.dense_index,
+    }
+    deviation = (surrogate_predictor(surrogate).predict(holdout) - exact.predict(holdout)) * PRICE_SCALE
+    surrogate['report'] = {
+        'n_components': n_components,
+        'n_train': len(train),
+        'n_holdout': n_holdout,
+        'max_abs_deviation': float(np.abs(deviation).max()),
+        'rmse': float(np.sqrt(np.mean(deviation ** 2))),
+    }
+    return surrogate
+
+
+def surrogate_predictor(surrogate):
+    """SparseRBFPredictor over the surrogate's landmarks"""
+    return SparseRBFPredictor(surrogate['landmarks'], surrogate['weights'], surrogate['intercept'],
+                              surrogate['gamma'], surrogate['dense_index'])
+
+
+def save_surrogate(surrogate, model_version, path=SURROGATE_PATH):
+    """Persist the surrogate, tagged with the version of the model it approximates"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump({**surrogate, 'model_version': model_version}, path)
+
+
+def load_surrogate(model_version, path=SURROGATE_PATH):
+    """The saved surrogate for this model version, or None"""
+    if not path.exists():
+        return None
+    surrogate = joblib.load(path)
+    if surrogate.get('version') != SURROGATE_VERSION or surrogate.get('model_version') != model_version:
+        return None
+    return surrogate
+
+
+def serving_predictor(model, encoder, model_version):
+    """The fastest predictor whose measured deviation from the model is within its threshold
+
+    The price lattice comes first when it qualifies; rows it does not cover go
+    to the surrogate when that qualifies, else to the exact predictor.
+    """
+    surrogate = load_surrogate(model_version)
+    if surrogate is not None and surrogate['report']['max_abs_deviation'] < SURROGATE_MAX_DEVIATION:
+        logger.info("Serving the surrogate model: %s", surrogate['report'])
+        predictor = surrogate_predictor(surrogate)
+    else:
+        predictor = make_predictor(model, encoder)
+
+    lattice = load_lattice(model_version, encoder)
+    if lattice is not None:
+        report = lattice['report']
+        if max(report['max_abs_deviation'], report['max_abs_deviation_offgrid']) < LATTICE_MAX_DEVIATION:
+            logger.info("Serving the price lattice: %s", report)
+            return LatticePredictor(lattice, fallback=predictor)
+    return predictor
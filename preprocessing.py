@@ -0,0 +1,188 @@
+"""Preprocessing shared by the apps: fitted once offline, applied as a pure transform"""
+import hashlib
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import PREPROCESSOR_PATH
+
+# Bump whenever the layout of the saved artifact changes
+PREPROCESSOR_VERSION = 2
+
+# === COLUMN GROUPS ===
+drop_cols = ['ID', 'State', 'VIN_(1-10)', 'DOL_Vehicle_ID', 'Vehicle_Location', 'Base_MSRP']
+freq_cols = ['County', 'Electric_Utility', 'Legislative_District', 'City']
+onehot_cols = ['Make', 'Model', 'Electric_Vehicle_Type', 'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility']
+scale_cols = ['Model_Year', 'Electric_Range']
+
+# Not a model feature: only used to fill in the freq_cols from one ZIP input
+zip_col = 'ZIP_Code'
+
+# Everything the apps read from the dataset; the rest (drop_cols and co.) is never loaded
+dataset_cols = onehot_cols + scale_cols + freq_cols + [zip_col, 'Expected_Price']
+
+# Exact column order expected by svr_model.joblib
+correct_column_order = ['Model_Year','Electric_Range','County_freq','Electric_Utility_freq','Legislative_District_freq','City_freq',
+                        'Make_AUDI','Make_AZURE DYNAMICS','Make_BENTLEY','Make_BMW','Make_CADILLAC','Make_CHEVROLET','Make_CHRYSLER',
+                        'Make_DODGE','Make_FIAT','Make_FISKER','Make_FORD','Make_HONDA','Make_HYUNDAI','Make_JAGUAR','Make_JEEP',
+                        'Make_KIA','Make_LAND ROVER','Make_LINCOLN','Make_MERCEDES-BENZ','Make_MINI','Make_MITSUBISHI','Make_NISSAN',
+                        'Make_POLESTAR','Make_PORSCHE','Make_SMART','Make_SUBARU','Make_TESLA','Make_TH!NK','Make_TOYOTA',
+                        'Make_VOLKSWAGEN','Make_VOLVO','Make_WHEEGO ELECTRIC CARS','Model_$16.36K','Model_330E','Model_500',
+                        'Model_530E','Model_530E XDRIVE','Model_740E XDRIVE','Model_745E','Model_918 SPYDER','Model_A3','Model_A7',
+                        'Model_A8 E','Model_ACCORD','Model_AVIATOR','Model_B-CLASS','Model_BENTAYGA','Model_BOLT EV','Model_C-CLASS',
+                        'Model_C-MAX','Model_CARAVAN','Model_CAYENNE','Model_CITY','Model_CLARITY','Model_CORSAIR','Model_COUNTRYMAN',
+                        'Model_CROSSTREK HYBRID AWD','Model_CT6','Model_E-GOLF','Model_E-TRON','Model_E-TRON SPORTBACK','Model_ELR',
+                        'Model_EQ FORTWO','Model_ESCAPE','Model_FOCUS','Model_FORTWO','Model_FORTWO ELECTRIC DRIVE','Model_FUSION',
+                        'Model_GLC-CLASS','Model_GLE-CLASS','Model_HARDTOP','Model_I-MIEV','Model_I-PACE','Model_I3','Model_I8',
+                        'Model_IONIQ','Model_KARMA','Model_KONA','Model_LEAF','Model_LIFE','Model_MODEL 3','Model_MODEL S',
+                        'Model_MODEL X','Model_MODEL Y','Model_NIRO','Model_NIRO ELECTRIC','Model_NIRO PLUG-IN HYBRID','Model_OPTIMA',
+                        'Model_OPTIMA PLUG-IN HYBRID','Model_OUTLANDER','Model_PACIFICA','Model_PANAMERA','Model_PRIUS PLUG-IN',
+                        'Model_PRIUS PLUG-IN HYBRID','Model_PRIUS PRIME','Model_PS2','Model_Q5','Model_Q5 E','Model_RANGE ROVER',
+                        'Model_RANGE ROVER SPORT','Model_RANGER','Model_RAV4','Model_RAV4 PRIME','Model_ROADSTER','Model_S-CLASS',
+                        'Model_S60','Model_S90','Model_SANTA FE','Model_SONATA','Model_SONATA PLUG-IN HYBRID','Model_SORENTO',
+                        'Model_SOUL','Model_SOUL EV','Model_SPARK','Model_TAYCAN','Model_TRANSIT CONNECT ELECTRIC','Model_TUCSON',
+                        'Model_VOLT','Model_WRANGLER','Model_X3','Model_X5','Model_XC60','Model_XC60 AWD','Model_XC60 AWD PHEV',
+                        'Model_XC90','Model_XC90 AWD','Model_XC90 AWD PHEV','Electric_Vehicle_Type_Battery Electric Vehicle (BEV)',
+                        'Electric_Vehicle_Type_Plug-in Hybrid Electric Vehicle (PHEV)','Electric_Vehicle_Type_nan',
+                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_Clean Alternative Fuel Vehicle Eligible',
+                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_Not eligible due to low battery range',
+                        'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility_nan']
+
+
+def clean_columns(df):
+    """Replace spaces in the raw dataset column names with underscores"""
+    df.columns = df.columns.str.replace(' ', '_')
+    return df
+
+
+def build_freq_table(values):
+    """Frequency encoding of one column as a lookup array over its category codes"""
+    counts = values.value_counts().sort_index()
+    low, high = counts.min(), counts.max()
+    span = (high - low) or 1
+
+    return {
+        'categories': counts.index.tolist(),
+        'min': int(low),
+        'max': int(high),
+        # Min-max scaled with the train-time range; the extra last slot is
+        # what code -1 (a value never seen in the dataset) reads
+        'values': np.append((counts.to_numpy(dtype=np.float64) - low) / span, 0.0),
+    }
+
+
+def build_preprocessor(df):
+    """Fit the one-hot vocabularies, scaler statistics and frequency tables on the dataset"""
+    # Only fitting needs scikit-learn; keep it out of the serving import path
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    encoder = OneHotEncoder(handle_unknown='ignore').fit(df[onehot_cols])
+    scaler = StandardScaler().fit(df[scale_cols])
+
+    return {
+        'version': PREPROCESSOR_VERSION,
+        'n_rows': len(df),
+        'onehot_categories': {col: list(cats) for col, cats in zip(onehot_cols, encoder.categories_)},
+        'scale_mean': dict(zip(scale_cols, scaler.mean_.tolist())),
+        'scale_std': dict(zip(scale_cols, scaler.scale_.tolist())),
+        'freq_tables': {col: build_freq_table(df[col]) for col in freq_cols},
+    }
+
+
+def save_preprocessor(preprocessor, path=PREPROCESSOR_PATH):
+    """Persist the preprocessing artifact next to the model"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(preprocessor, path)
+
+
+def load_preprocessor(path=PREPROCESSOR_PATH):
+    """Load the preprocessing artifact, or None when it is missing or from an older version"""
+    if not path.exists():
+        return None
+    preprocessor = joblib.load(path)
+    if preprocessor.get('version') != PREPROCESSOR_VERSION:
+        return None
+    return preprocessor
+
+
+class FeatureEncoder:
+    """Encode raw inputs straight into NumPy rows laid out like the model's features"""
+
+    def __init__(self, preprocessor, columns=correct_column_order):
+        self.columns = list(columns)
+        self.n_features = len(self.columns)
+        position = {name: i for i, name in enumerate(self.columns)}
+
+        self.scale_index = np.array([position[col] for col in scale_cols])
+        self.scale_mean = np.array([preprocessor['scale_mean'][col] for col in scale_cols])
+        self.scale_std = np.array([preprocessor['scale_std'][col] for col in scale_cols])
+
+        self.freq_index = np.array([position[col + '_freq'] for col in freq_cols])
+        self.dense_index = np.concatenate([self.scale_index, self.freq_index])
+        tables = [preprocessor['freq_tables'][col] for col in freq_cols]
+        self.freq_categories = [pd.Index(table['categories']) for table in tables]
+        self.freq_codes = [{category: code for code, category in enumerate(table['categories'])} for table in tables]
+        self.freq_values = [table['values'] for table in tables]
+
+        # category -> column index, for the categories the model was trained on
+        self.hot_index = {
+            col: {category: position[f'{col}_{category}']
+                  for category in preprocessor['onehot_categories'][col] if f'{col}_{category}' in position}
+            for col in onehot_cols
+        }
+
+    def check_model(self, model):
+        """Fail fast when the model was trained on a different feature layout"""
+        if model.n_features_in_ != self.n_features:
+            raise ValueError(f"Model expects {model.n_features_in_} features, encoder produces {self.n_features}")
+        names = getattr(model, 'feature_names_in_', None)
+        if names is not None and list(names) != self.columns:
+            raise ValueError("Model feature names do not match the encoder column order")
+
+    def encode_row(self, values):
+        """Encode one input given as {raw column: value} into a (1, n_features) array"""
+        row = np.zeros((1, self.n_features))
+        row[0, self.scale_index] = (np.array([values[col] for col in scale_cols], dtype=np.float64)
+                                    - self.scale_mean) / self.scale_std
+
+        row[0, self.freq_index] = [table[codes.get(values[col], -1)]
+                                   for col, codes, table in zip(freq_cols, self.freq_codes, self.freq_values)]
+
+        for col in onehot_cols:
+            index = self.hot_index[col].get(values[col])
+            if index is not None:
+                row[0, index] = 1
+        return row
+
+    def encode_batch(self, frame):
+        """Encode a DataFrame of raw inputs into an (n_rows, n_features) array"""
+        n_rows = len(frame)
+        rows = np.zeros((n_rows, self.n_features))
+        row_ids = np.arange(n_rows)
+
+        dense = frame[scale_cols].to_numpy(dtype=np.float64)
+        rows[:, self.scale_index] = (dense - self.scale_mean) / self.scale_std
+
+        for index, col, categories, table in zip(self.freq_index, freq_cols, self.freq_categories, self.freq_values):
+            rows[:, index] = table[categories.get_indexer(frame[col])]
+
+        for col in onehot_cols:
+            index = frame[col].map(self.hot_index[col]).to_numpy(dtype=np.float64)
+            known = ~np.isnan(index)
+            rows[row_ids[known], index[known].astype(np.intp)] = 1
+        return rows
+
+    def frame(self, rows):
+        """Wrap encoded rows with the column names the sklearn model was fitted with"""
+        return pd.DataFrame(rows, columns=self.columns)
+
+    def fingerprint(self):
+        """Digest of everything that maps raw inputs to encoded values, for artifacts that bake them in"""
+        digest = hashlib.sha256(json.dumps([self.columns, self.hot_index], default=str).encode())
+        for array in [self.scale_mean, self.scale_std, *self.freq_values]:
+            digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        for categories in self.freq_categories:
+            digest.update(json.dumps(categories.tolist(), default=str).encode())
+        return digest.hexdigest()[:16]
@@ -0,0 +1,148 @@
+"""Materialized aggregate cube of registrations and Expected_Price for the dashboards
+
+One grouped pass over the dataset collapses it to a row per (Make,
+Model_Year, County, EV type, price bin) with the number of registrations
+and the sum of their prices. Counts and sums add up across cells, and so do
+the per-bin counts, so any slice of the cube rolls up to registrations, mean
+and quantiles without touching the raw rows. The cube is stored as a
+dictionary-encoded Feather table like the dataset snapshot; like the price
+quantiles, it remembers which rows it has counted so a grown dataset only
+adds its new rows.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from config import PRICE_CUBE_PATH, PRICE_SCALE
+from price_quantiles import BIN_WIDTH, N_BINS, histogram_quantiles, price_bins, rows_fingerprint
+
+PRICE_CUBE_VERSION = 1
+
+cube_dims = ['Make', 'Model_Year', 'County', 'Electric_Vehicle_Type']
+_fingerprint_cols = cube_dims + ['Expected_Price']
+
+# Column names of histogram_quantiles' QUANTILES
+_quantile_cols = ['P5', 'P25', 'Median', 'P75', 'P95']
+
+
+def _cells(df):
+    """Registrations and price sum per cube cell and price bin"""
+    df = df.dropna(subset=['Expected_Price'])
+    frame = pd.DataFrame({col: df[col].to_numpy(dtype=object) for col in cube_dims})
+    frame['bin'] = price_bins(df['Expected_Price'])
+    frame['price'] = df['Expected_Price'].to_numpy(dtype=np.float64)
+    return _merge(frame.groupby(cube_dims + ['bin'], dropna=False, sort=False)
+                       .agg(count=('price', 'size'), price_sum=('price', 'sum')).reset_index())
+
+
+def _merge(cells):
+    """Sum duplicate cells and restore the column types"""
+    cells = (cells.groupby(cube_dims + ['bin'], dropna=False)[['count', 'price_sum']].sum().reset_index())
+    for col in cube_dims:
+        cells[col] = cells[col].astype('category')
+    cells['bin'] = cells['bin'].astype(np.int32)
+    cells['count'] = cells['count'].astype(np.int64)
+    return cells
+
+
+def build_price_cube(df):
+    """The cube of every registration in `df`"""
+    return {
+        'version': PRICE_CUBE_VERSION,
+        'n_rows': len(df),
+        'fingerprint': rows_fingerprint(df, _fingerprint_cols),
+        'cells': _cells(df),
+    }
+
+
+def refresh_price_cube(price_cube, df):
+    """The cube of `df` and the number of rows counted, adding only the new rows when `df` only grew"""
+    if price_cube is not None and price_cube['n_rows'] <= len(df):
+        if rows_fingerprint(df.iloc[:price_cube['n_rows']], _fingerprint_cols) == price_cube['fingerprint']:
+            new_cells = _cells(df.iloc[price_cube['n_rows']:])
+            cells = pd.concat([price_cube['cells'].astype({col: object for col in cube_dims}),
+                               new_cells.astype({col: object for col in cube_dims})], ignore_index=True)
+            refreshed = {
+                'version': PRICE_CUBE_VERSION,
+                'n_rows': len(df),
+                'fingerprint': rows_fingerprint(df, _fingerprint_cols),
+                'cells': _merge(cells),
+            }
+            return refreshed, len(df) - price_cube['n_rows']
+    return build_price_cube(df), len(df)
+
+
+def _group_histograms(price_cube, by, filters):
+    """Registration and price totals per group of `by` and their (groups, N_BINS) price histograms"""
+    cells = price_cube['cells']
+    keep = np.ones(len(cells), dtype=bool)
+    for col, values in filters.items():
+        if values:
+            keep &= cells[col].isin(values).to_numpy()
+    cells = cells[keep]
+
+    groups = cells.groupby(by, observed=True, dropna=False)
+    totals = groups[['count', 'price_sum']].sum()
+    flat = groups.ngroup().to_numpy() * N_BINS + cells['bin'].to_numpy()
+    hist = np.bincount(flat, weights=cells['count'].to_numpy(), minlength=len(totals) * N_BINS).reshape(-1, N_BINS)
+    return totals, hist
+
+
+def slice_price_cube(price_cube, by, **filters):
+    """Registrations, mean and quantiles of Expected_Price (in dollars) per group of `by`
+
+    `filters` maps cube dimensions to the values to keep; an empty list
+    keeps everything.
+    """
+    totals, hist = _group_histograms(price_cube, by, filters)
+    result = pd.DataFrame(histogram_quantiles(hist) if len(totals) else np.empty((0, len(_quantile_cols))),
+                          index=totals.index, columns=_quantile_cols)
+    result.insert(0, 'Registrations', totals['count'])
+    result.insert(1, 'Mean', totals['price_sum'] / totals['count'] * PRICE_SCALE)
+    return result.reset_index()
+
+
+def slice_price_bands(price_cube, by, n_bands, **filters):
+    """Groups of `by`, centers of at most `n_bands` price bands (in dollars) and the (groups, bands) registrations
+
+    The bands merge whole price bins and span the occupied ones only;
+    `filters` is as for slice_price_cube.
+    """
+    totals, hist = _group_histograms(price_cube, by, filters)
+    groups = totals.index.to_frame(index=False)
+    occupied = np.flatnonzero(hist.sum(axis=0))
+    if not len(occupied):
+        return groups, np.empty(0), np.zeros((len(groups), 0), dtype=np.int64)
+    first, stop = occupied[0], occupied[-1] + 1
+    width = -(-(stop - first) // n_bands)
+    n = -(-(stop - first) // width)
+    hist = np.pad(hist[:, first:], ((0, 0), (0, max(0, first + n * width - N_BINS))))[:, :n * width]
+    counts = hist.reshape(len(groups), n, width).sum(axis=2).astype(np.int64)
+    return groups, (first + (np.arange(n) + 0.5) * width) * BIN_WIDTH * PRICE_SCALE, counts
+
+
+def save_price_cube(price_cube, path=PRICE_CUBE_PATH):
+    """Write the cube as an uncompressed Feather table, with its bookkeeping in the schema metadata"""
+    table = pa.Table.from_pandas(price_cube['cells'], preserve_index=False)
+    metadata = {key: price_cube[key] for key in ('version', 'n_rows', 'fingerprint')}
+    table = table.replace_schema_metadata({**table.schema.metadata, b'price_cube': json.dumps(metadata)})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # The old cube may still be memory-mapped: write beside it and swap
+    tmp_path = path.with_name(path.name + '.tmp')
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+
+def read_price_cube(path=PRICE_CUBE_PATH):
+    """Memory-map the saved cube, or None when it is missing or from an older version"""
+    if not path.exists():
+        return None
+    table = feather.read_table(path, memory_map=True)
+    metadata = json.loads((table.schema.metadata or {}).get(b'price_cube', b'{}'))
+    if metadata.get('version') != PRICE_CUBE_VERSION:
+        return None
+    return {**metadata, 'cells': table.to_pandas()}
@@ -0,0 +1,142 @@
+"""Expected_Price distribution per segment, for placing an estimate on the gauge
+
+Prices are counted into fixed-width bins per segment: every car, every Make,
+every EV type and every (Make, EV type) pair. Histograms with the same bins
+add up, so new registrations are folded in with update_price_quantiles
+instead of rescanning the dataset, and quantiles are read off the
+cumulative counts. The histograms remember how many dataset rows they have
+counted and a fingerprint of them, so when the dataset only grew,
+refresh_price_quantiles counts just the appended rows.
+"""
+import hashlib
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import PRICE_QUANTILES_PATH, PRICE_SCALE
+
+PRICE_QUANTILES_VERSION = 1
+
+# Bin edges in the dataset's unit (thousands of dollars); the last bin also takes everything above
+BIN_WIDTH = 0.5
+MAX_PRICE = 500.0
+N_BINS = int(round(MAX_PRICE / BIN_WIDTH))
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Segments with fewer registrations fall back to a coarser one
+MIN_SEGMENT_SIZE = 30
+
+_segment_cols = {
+    'make_type': ['Make', 'Electric_Vehicle_Type'],
+    'make': ['Make'],
+    'type': ['Electric_Vehicle_Type'],
+}
+_fingerprint_cols = ['Make', 'Electric_Vehicle_Type', 'Expected_Price']
+
+
+def price_bins(prices):
+    """Histogram bin of each Expected_Price"""
+    return np.clip((np.asarray(prices, dtype=np.float64) / BIN_WIDTH).astype(np.int64), 0, N_BINS - 1)
+
+
+def histogram_quantiles(hist):
+    """QUANTILES in dollars of each histogram (row of `hist`), interpolated linearly inside each bin"""
+    hist = np.atleast_2d(hist)
+    cumulative = np.cumsum(hist, axis=1)
+    targets = np.asarray(QUANTILES)[None, :] * cumulative[:, -1:]
+    # First bin whose cumulative count reaches each target
+    index = np.minimum((cumulative[:, None, :] < targets[:, :, None]).sum(axis=2), hist.shape[1] - 1)
+    before = np.where(index > 0, np.take_along_axis(cumulative, np.maximum(index - 1, 0), axis=1), 0)
+    inside = (targets - before) / np.maximum(np.take_along_axis(hist, index, axis=1), 1)
+    return (index + inside) * BIN_WIDTH * PRICE_SCALE
+
+
+def rows_fingerprint(df, cols):
+    """Content hash of `cols` over the rows of `df`, to tell appended rows from changed ones"""
+    hashes = pd.util.hash_pandas_object(df[cols], index=False)
+    return hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()
+
+
+def _histograms(df):
+    """{(level, key): counts} for every segment of `df`, in one binning pass"""
+    df = df.dropna(subset=['Expected_Price'])
+    frame = pd.DataFrame({'Make': df['Make'].astype(str).to_numpy(),
+                          'Electric_Vehicle_Type': df['Electric_Vehicle_Type'].astype(str).to_numpy(),
+                          'bin': price_bins(df['Expected_Price'])})
+
+    # The finest level is counted from the data; the others are sums of it
+    finest = frame.groupby(_segment_cols['make_type'] + ['bin']).size()
+    histograms = {}
+    for level, cols in _segment_cols.items():
+        counts = finest.groupby(level=cols + ['bin']).sum()
+        # A one-level list makes pandas warn about the shape of the keys
+        for key, segment in counts.groupby(level=cols if len(cols) > 1 else cols[0]):
+            hist = np.zeros(N_BINS, dtype=np.int64)
+            hist[segment.index.get_level_values('bin')] = segment.to_numpy()
+            histograms[(level, key if isinstance(key, tuple) else (key,))] = hist
+    histograms[('all', ())] = np.bincount(frame['bin'], minlength=N_BINS).astype(np.int64)
+    return histograms
+
+
+def _summarize(histograms, df):
+    return {
+        'version': PRICE_QUANTILES_VERSION,
+        'n_rows': len(df),
+        'fingerprint': rows_fingerprint(df, _fingerprint_cols),
+        'histograms': histograms,
+        'counts': {segment: int(hist.sum()) for segment, hist in histograms.items()},
+        'quantiles': {segment: histogram_quantiles(hist)[0].tolist()
+                      for segment, hist in histograms.items() if hist.sum()},
+    }
+
+
+def build_price_quantiles(df):
+    """Histograms and quantiles for every segment of the dataset"""
+    return _summarize(_histograms(df), df)
+
+
+def update_price_quantiles(price_quantiles, df):
+    """Fold the rows of `df` past the ones already counted into the histograms"""
+    histograms = {segment: hist.copy() for segment, hist in price_quantiles['histograms'].items()}
+    for segment, hist in _histograms(df.iloc[price_quantiles['n_rows']:]).items():
+        if segment in histograms:
+            histograms[segment] += hist
+        else:
+            histograms[segment] = hist
+    return _summarize(histograms, df)
+
+
+def refresh_price_quantiles(price_quantiles, df):
+    """Quantiles for `df` and the number of rows counted, updating `price_quantiles` when `df` only grew"""
+    if price_quantiles is not None and price_quantiles['n_rows'] <= len(df):
+        if rows_fingerprint(df.iloc[:price_quantiles['n_rows']], _fingerprint_cols) == price_quantiles['fingerprint']:
+            return update_price_quantiles(price_quantiles, df), len(df) - price_quantiles['n_rows']
+    return build_price_quantiles(df), len(df)
+
+
+def segment_quantiles(price_quantiles, make, ev_type):
+    """(segment label, quantiles in dollars) of the narrowest segment with enough registrations"""
+    counts = price_quantiles['counts']
+    for segment, label in [(('make_type', (make, ev_type)), f"{make} {ev_type}"),
+                           (('make', (make,)), make),
+                           (('type', (ev_type,)), ev_type)]:
+        if counts.get(segment, 0) >= MIN_SEGMENT_SIZE:
+            return label, price_quantiles['quantiles'][segment]
+    return "all cars", price_quantiles['quantiles'][('all', ())]
+
+
+def save_price_quantiles(price_quantiles, path=PRICE_QUANTILES_PATH):
+    """Persist the histograms and quantiles"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(price_quantiles, path)
+
+
+def read_price_quantiles(path=PRICE_QUANTILES_PATH):
+    """The saved histograms and quantiles, or None when missing or from an older version"""
+    if not path.exists():
+        return None
+    price_quantiles = joblib.load(path)
+    if price_quantiles.get('version') != PRICE_QUANTILES_VERSION:
+        return None
+    return price_quantiles
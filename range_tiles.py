@@ -0,0 +1,67 @@
+"""Prebuilt hexagonal tiles of registrations over Electric_Range and Expected_Price
+
+Electric_Range is not a dimension of the price cube, so the range / price
+chart would otherwise re-bin every registration on each rerun. The tiles
+are counted once per EV type on one grid spanning the whole dataset; tiles
+on the same grid add up, so any selection of EV types is a group-by over a
+few thousand rows instead of a pass over the dataset.
+"""
+import joblib
+import numpy as np
+import pandas as pd
+
+from chart_data import grid_shape, hexbin
+from config import PRICE_SCALE, RANGE_TILES_PATH
+
+RANGE_TILES_VERSION = 1
+
+# Size in pixels of a tile on the half-width chart the tiles are drawn on
+TILE_PX = 14
+CHART_WIDTH = 600
+CHART_HEIGHT = 350
+
+
+def build_range_tiles(df):
+    """Tile centers and registrations per EV type, on a grid sized to the chart"""
+    ranges = df['Electric_Range'].to_numpy(dtype=np.float64)
+    prices = df['Expected_Price'].to_numpy(dtype=np.float64) * PRICE_SCALE
+    known = np.isfinite(ranges) & np.isfinite(prices)
+    n_x, n_y = grid_shape(width=CHART_WIDTH, height=CHART_HEIGHT, cell_px=TILE_PX)
+    gridsize = (n_x, int(n_y / np.sqrt(3)))
+
+    frames = []
+    if known.any():
+        bounds = ((ranges[known].min(), ranges[known].max()), (prices[known].min(), prices[known].max()))
+        ev_types = df['Electric_Vehicle_Type'].to_numpy(dtype=object)
+        for ev_type in pd.unique(ev_types):
+            rows = pd.isna(ev_types) if pd.isna(ev_type) else ev_types == ev_type
+            tiles = hexbin(ranges[rows], prices[rows], gridsize=gridsize, bounds=bounds)
+            tiles.insert(0, 'Electric_Vehicle_Type', ev_type)
+            frames.append(tiles)
+    tiles = (pd.concat(frames, ignore_index=True) if frames
+             else pd.DataFrame({'Electric_Vehicle_Type': [], 'x': [], 'y': [], 'count': []}))
+    return {'version': RANGE_TILES_VERSION, 'tile_px': TILE_PX, 'tiles': tiles}
+
+
+def select_range_tiles(range_tiles, ev_types):
+    """Tiles summed over the selected EV types (all of them when `ev_types` is empty)"""
+    tiles = range_tiles['tiles']
+    if ev_types:
+        tiles = tiles[tiles['Electric_Vehicle_Type'].isin(ev_types)]
+    return tiles.groupby(['x', 'y'], as_index=False)['count'].sum()
+
+
+def save_range_tiles(range_tiles, path=RANGE_TILES_PATH):
+    """Persist the tiles"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(range_tiles, path)
+
+
+def read_range_tiles(path=RANGE_TILES_PATH):
+    """The saved tiles, or None when missing or from an older version"""
+    if not path.exists():
+        return None
+    range_tiles = joblib.load(path)
+    if range_tiles.get('version') != RANGE_TILES_VERSION:
+        return None
+    return range_tiles
@@ -0,0 +1,112 @@
+"""Headless batch scorer: price every row of a registration CSV without the UI
+
+The input is split into newline-aligned byte ranges of about `--chunk-size`
+rows. Each worker process reads, parses, prices and formats its own range,
+so the parent only seeks and appends finished CSV text to the output, in
+input order; memory stays flat whatever the file size:
+
+    python score_inventory.py registrations.csv priced.csv --workers 8
+
+The output keeps the input's column names and order, with an
+Estimated_Price column appended. Splitting on newlines assumes no quoted
+field spans lines, which holds for the registration exports. Uses the same
+artifacts as the apps; run build_artifacts.py first.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+from pathlib import Path
+
+import pandas as pd
+
+from batch import PRICE_COLUMN, load_scoring_resources, prepare_batch, restore_columns, score_batch
+
+# Set in each worker process by _init_worker
+_predictor = None
+_encoder = None
+
+
+def _init_worker():
+    global _predictor, _encoder
+    # One BLAS thread per process: the pool already uses every core
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+    # Forked workers share the memory-mapped model store pages
+    _predictor, _encoder = load_scoring_resources()
+
+
+def _byte_ranges(path, chunk_rows, sample_rows=1000):
+    """Header line and (start, end) byte offsets of row chunks, each ending on a line break"""
+    size = path.stat().st_size
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        sample = [f.readline() for _ in range(sample_rows)]
+        sample_bytes = sum(len(line) for line in sample)
+        n_sampled = sum(1 for line in sample if line)
+        chunk_bytes = max(1, sample_bytes // max(n_sampled, 1) * chunk_rows)
+        ranges = []
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def _score_range(path, header, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        chunk = pd.read_csv(io.BytesIO(header + f.read(end - start)))
+    frame, problems = prepare_batch(chunk, _encoder)
+    priced = restore_columns(score_batch(_predictor, _encoder, frame), chunk.columns)
+    return priced.to_csv(header=False, index=False), len(chunk), len(priced), problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price every row of a registration CSV")
+    parser.add_argument('input', type=Path, help="CSV with the dataset's input columns")
+    parser.add_argument('output', type=Path, help="priced CSV to write")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="scoring processes")
+    parser.add_argument('--chunk-size', type=int, default=20000, help="rows (approximately) read and scored per task")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_read = n_written = 0
+    header, ranges = _byte_ranges(args.input, args.chunk_size)
+    columns = pd.read_csv(io.BytesIO(header), nrows=0).columns
+    with Pool(args.workers, initializer=_init_worker) as pool, open(args.output, 'w', newline='') as out:
+        out.write(pd.DataFrame(columns=list(columns) + [PRICE_COLUMN]).to_csv(index=False))
+        # At most two chunks per worker in flight, so finished text never piles up
+        pending = deque()
+
+        def write_next():
+            nonlocal n_read, n_written
+            text, n_rows, n_priced, problems = pending.popleft().get()
+            for problem in problems:
+                print(f"rows {n_read + 1:,}-{n_read + n_rows:,}: {problem}", file=sys.stderr)
+            out.write(text)
+            n_read += n_rows
+            n_written += n_priced
+            elapsed = time.perf_counter() - start
+            print(f"{n_read:,} rows in {elapsed:.1f}s ({n_read / elapsed:,.0f} rows/s)", file=sys.stderr)
+
+        for byte_range in ranges:
+            pending.append(pool.apply_async(_score_range, (args.input, header, *byte_range)))
+            if len(pending) >= 2 * args.workers:
+                write_next()
+        while pending:
+            write_next()
+
+    elapsed = time.perf_counter() - start
+    print(f"Priced {n_written:,} of {n_read:,} rows -> {args.output} "
+          f"in {elapsed:.1f}s ({n_read / max(elapsed, 1e-9):,.0f} rows/s, {args.workers} workers)")
+
+
+if __name__ == '__main__':
+    main()
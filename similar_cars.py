@@ -0,0 +1,68 @@
+"""Nearest registered cars for the price comparison chart
+
+The index is categorical-aware: registrations are collapsed to one entry
+per (Make, Model, Model_Year, Electric_Range) with the median
+Expected_Price, and grouped by Make and Model. A query only scans its own
+model's entries (falling back to the make, then to every car) on
+Model_Year and Electric_Range standardized by the dataset spread, so it
+never touches the full dataset. Buckets too large for a linear scan get a
+KD-tree.
+"""
+import numpy as np
+import pandas as pd
+
+from config import PRICE_SCALE
+
+_key_cols = ['Make', 'Model', 'Model_Year', 'Electric_Range']
+
+# Buckets with more entries than this are searched with a KD-tree
+KDTREE_MIN_SIZE = 512
+
+
+class SimilarCarIndex:
+    """Make/Model buckets of (year, range, price) arrays for k-nearest-car queries"""
+
+    def __init__(self, df):
+        cars = (df.dropna(subset=_key_cols + ['Expected_Price'])
+                  .groupby(_key_cols, observed=True)['Expected_Price']
+                  .agg(['median', 'size'])
+                  .reset_index())
+        self.cars = pd.DataFrame({
+            'Make': cars['Make'].astype(str).to_numpy(),
+            'Model': cars['Model'].astype(str).to_numpy(),
+            'Year': cars['Model_Year'].to_numpy(dtype=np.int64),
+            'Range': cars['Electric_Range'].to_numpy(dtype=np.int64),
+            'Price': cars['median'].to_numpy(dtype=np.float64) * PRICE_SCALE,
+            'Registrations': cars['size'].to_numpy(dtype=np.int64),
+        })
+        self.scale = np.array([max(df['Model_Year'].std(), 1e-9), max(df['Electric_Range'].std(), 1e-9)])
+        self.points = self.cars[['Year', 'Range']].to_numpy(dtype=np.float64) / self.scale
+
+        # key -> (row positions in self.cars, KD-tree over them or None)
+        self.by_model = {key: self._bucket(rows) for key, rows in self.cars.groupby(['Make', 'Model']).indices.items()}
+        self.by_make = {key: self._bucket(rows) for key, rows in self.cars.groupby('Make').indices.items()}
+        self.everything = self._bucket(np.arange(len(self.cars)))
+
+    def _bucket(self, rows):
+        if len(rows) <= KDTREE_MIN_SIZE:
+            return rows, None
+        from sklearn.neighbors import KDTree
+        return rows, KDTree(self.points[rows])
+
+    def query(self, make, model, year, electric_range, k=5):
+        """The k cars closest in year and range, from the same model when it has any"""
+        bucket = self.by_model.get((make, model))
+        if bucket is None:
+            bucket = self.by_make.get(make, self.everything)
+        candidates, tree = bucket
+
+        target = np.array([year, electric_range], dtype=np.float64) / self.scale
+        if tree is not None:
+            nearest = tree.query(target[None, :], k=min(k, len(candidates)), return_distance=False)[0]
+            return self.cars.iloc[candidates[nearest]].reset_index(drop=True)
+
+        sq_dist = ((self.points[candidates] - target) ** 2).sum(axis=1)
+        if len(candidates) > k:
+            nearest = np.argpartition(sq_dist, k)[:k]
+            candidates, sq_dist = candidates[nearest], sq_dist[nearest]
+        return self.cars.iloc[candidates[np.argsort(sq_dist, kind='stable')]].reset_index(drop=True)
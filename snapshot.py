@@ -0,0 +1,43 @@
+"""Columnar snapshot of the registration dataset
+
+The raw CSV stores Make, Model, County, City, Electric_Utility and friends as
+Python strings, one object per row. The snapshot keeps only the columns the
+apps use, dictionary-encodes the text columns (pandas categoricals once
+loaded) and is written uncompressed in Arrow's Feather format so it can be
+memory-mapped instead of parsed.
+"""
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+
+from preprocessing import dataset_cols
+
+
+def write_snapshot(csv_path, snapshot_path):
+    """Convert the raw CSV into a dictionary-encoded Feather snapshot"""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    raw_names = {name.replace(' ', '_'): name for name in header}
+    missing = [col for col in dataset_cols if col not in raw_names]
+    if missing:
+        raise ValueError(f"Dataset is missing columns: {missing}")
+
+    table = pa_csv.read_csv(
+        csv_path,
+        convert_options=pa_csv.ConvertOptions(include_columns=[raw_names[col] for col in dataset_cols]),
+    )
+    table = table.rename_columns(dataset_cols)
+
+    columns = [column.dictionary_encode() if pa.types.is_string(column.type) else column
+               for column in table.columns]
+    table = pa.table(columns, names=dataset_cols)
+
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    feather.write_feather(table, snapshot_path, compression='uncompressed')
+    return table.num_rows
+
+
+def read_snapshot(snapshot_path, columns=dataset_cols):
+    """Memory-map the snapshot and return the requested columns as a DataFrame"""
+    table = feather.read_table(snapshot_path, columns=list(columns), memory_map=True)
+    return table.to_pandas()
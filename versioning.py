@@ -0,0 +1,27 @@
+"""Content digests used to tie artifacts and caches to one version of their inputs"""
+import hashlib
+
+from config import LATTICE_PATH, MODEL_PATH, PREPROCESSOR_PATH, SURROGATE_PATH
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content, as a hex string"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_version(path=MODEL_PATH):
+    """Short content digest of the model file, used to key model-dependent artifacts"""
+    return file_digest(path)[:16]
+
+
+def serving_version(paths=(MODEL_PATH, PREPROCESSOR_PATH, SURROGATE_PATH, LATTICE_PATH)):
+    """Short digest of every artifact that shapes a served price, skipping the ones not built"""
+    digest = hashlib.sha256()
+    for path in paths:
+        if path.exists():
+            digest.update(file_digest(path).encode())
+    return digest.hexdigest()[:16]
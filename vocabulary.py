@@ -0,0 +1,72 @@
+"""Prebuilt dropdown vocabularies, so the prediction form renders without the dataset
+
+The vocabulary holds a Make -> Model -> options index: for every model
+seen in the dataset, its EV types, CAFV values and year and range bounds. The form narrows each selector with dict
+lookups instead of filtering the dataset, and only offers combinations
+that exist. Likewise a ZIP -> location index fills County, City,
+Electric_Utility and Legislative_District from a single ZIP code.
+"""
+import json
+
+import numpy as np
+
+from config import VOCABULARY_PATH
+from preprocessing import freq_cols, scale_cols, zip_col
+
+VOCABULARY_VERSION = 5
+
+# Per-model choices, narrowed by the selected Make and Model
+_car_cols = ['Electric_Vehicle_Type', 'Clean_Alternative_Fuel_Vehicle_(CAFV)_Eligibility']
+
+
+def build_vocabulary(df):
+    """Per-model choices and ZIP code locations"""
+    return {
+        'version': VOCABULARY_VERSION,
+        'cars': build_car_index(df),
+        'zip_codes': build_zip_index(df),
+    }
+
+
+def build_car_index(df):
+    """{make: {model: {column: choices or [min, max]}}} over the combinations in the dataset"""
+    df = df.dropna(subset=['Make', 'Model'])
+    aggregations = {col: (col, lambda values: sorted(values.dropna().unique().tolist())) for col in _car_cols}
+    aggregations.update({f'{col}_min': (col, 'min') for col in scale_cols})
+    aggregations.update({f'{col}_max': (col, 'max') for col in scale_cols})
+    models = df.groupby(['Make', 'Model'], observed=True).agg(**aggregations)
+
+    cars = {}
+    for (make, model), row in models.iterrows():
+        options = {col: row[col] for col in _car_cols}
+        options.update({col: [int(row[f'{col}_min']), int(row[f'{col}_max'])] for col in scale_cols})
+        cars.setdefault(make, {})[model] = options
+    return {make: dict(sorted(by_model.items())) for make, by_model in sorted(cars.items())}
+
+
+def build_zip_index(df):
+    """{zip code: {location column: value}}, the most registered location of each ZIP code"""
+    counts = (df.dropna(subset=[zip_col] + freq_cols)
+                .groupby([zip_col] + freq_cols, observed=True).size()
+                .sort_values(ascending=False, kind='stable')
+                .reset_index())
+    # ZIP codes crossing a city or district line keep their most common location
+    counts = counts.drop_duplicates(subset=zip_col)
+    counts[zip_col] = counts[zip_col].astype(np.int64).astype(str).str.zfill(5)
+    return {record.pop(zip_col): record for record in counts.sort_values(zip_col)[[zip_col] + freq_cols].to_dict('records')}
+
+
+def save_vocabulary(vocab, path=VOCABULARY_PATH):
+    """Write the vocabulary bundle as compact JSON"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(vocab, separators=(',', ':')))
+
+
+def read_vocabulary(path=VOCABULARY_PATH):
+    """Read the vocabulary bundle, or None when it is missing or from an older version"""
+    if not path.exists():
+        return None
+    vocab = json.loads(path.read_text())
+    if vocab.get('version') != VOCABULARY_VERSION:
+        return None
+    return vocab
@@ -0,0 +1,46 @@
+"""What-if curves: the estimate across the car's registered Model_Year and Electric_Range, other inputs fixed"""
+import numpy as np
+import pandas as pd
+
+from config import PRICE_SCALE
+from preprocessing import scale_cols
+
+
+def sweep_points(low, high, max_points=200):
+    """Integer values from low to high, thinned evenly to at most max_points"""
+    return np.unique(np.linspace(low, high, min(max_points, int(high - low) + 1)).round())
+
+
+def car_sweep_ranges(car):
+    """[low, high] of every scaled column over the values the car was registered with
+
+    `car` is an entry of the vocabulary's Make -> Model index. A single
+    registered value is widened by one on each side, so its curve still
+    shows the local slope.
+    """
+    return {col: list(car[col]) if car[col][0] < car[col][1] else [car[col][0] - 1, car[col][1] + 1]
+            for col in scale_cols}
+
+
+def what_if_curves(predictor, encoder, values, ranges, max_points=200):
+    """{column: DataFrame of (column value, Price in dollars)} for every scaled column
+
+    The car is encoded once, the swept column is overwritten in a tiled
+    copy, and all points of all curves are priced in one predict call.
+    """
+    base = encoder.encode_row(values)
+    points = {col: sweep_points(*ranges[col], max_points=max_points) for col in scale_cols}
+
+    blocks = []
+    for position, col in enumerate(scale_cols):
+        block = np.repeat(base, len(points[col]), axis=0)
+        block[:, encoder.scale_index[position]] = (points[col] - encoder.scale_mean[position]) / encoder.scale_std[position]
+        blocks.append(block)
+    prices = predictor.predict(np.vstack(blocks)) * PRICE_SCALE
+
+    curves, start = {}, 0
+    for col in scale_cols:
+        end = start + len(points[col])
+        curves[col] = pd.DataFrame({col: points[col], 'Price': prices[start:end]})
+        start = end
+    return curves